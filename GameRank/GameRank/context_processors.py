@@ -1,20 +1,19 @@
+from django.utils.functional import SimpleLazyObject
 
-from explore.models import Game, Comment, Rating
+from explore.counters import siteCounter
+from explore.models import UserStats
 
-def global_metrics(request):
-    total_games = Game.objects.count()
-    total_comments = Comment.objects.count()
-    
-    user_votes = 0
-    user_comments = 0
-    if request.user.is_authenticated:
-        user_votes = Rating.objects.filter(user=request.user).count()
-        user_comments = Comment.objects.filter(user=request.user).count()
+# Se ejecuta en cada render (admin, errores, parciales HTMX...), así que todo es perezoso:
+# sólo se calcula si la plantilla llega a pintar el valor
 
+def global_metrics(request):
+    # una sola lectura por clave primaria de UserStats para los dos contadores del usuario
+    stats = SimpleLazyObject(
+        lambda: UserStats.forUser(request.user) if request.user.is_authenticated else UserStats()
+    )
     return {
-        'total_games': total_games,
-        'total_comments': total_comments,
-        'user_votes': user_votes,
-        'user_comments': user_comments,
+        'total_games': SimpleLazyObject(lambda: siteCounter('total_games')),
+        'total_comments': SimpleLazyObject(lambda: siteCounter('total_comments')),
+        'user_votes': SimpleLazyObject(lambda: stats.votes),
+        'user_comments': SimpleLazyObject(lambda: stats.comments),
     }
-
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+import django
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('gamerank.performance')
+
+# ------------------------------
+#   INSTRUMENTACIÓN SQL POR PETICIÓN
+# ------------------------------
+# Con SQL_INSTRUMENTATION activo el middleware apunta cada consulta (duración y desde
+# dónde se lanzó), el tiempo de render de las plantillas y el total de la petición.
+# Lo devuelve en la cabecera Server-Timing y, si la petición pasa de los umbrales o repite
+# la misma consulta desde el mismo sitio (N+1), lo escribe en el log gamerank.performance.
+# Desactivado, el middleware se descarta al arrancar y no cuesta nada.
+
+_metrics = ContextVar('request_metrics', default=None)
+
+TEMPLATE_BASE = os.path.join(os.path.dirname(django.__file__), 'template', 'base.py')
+
+
+def callSite():
+    # el nodo de plantilla o la línea de nuestro código más cercanos a la consulta
+    frame = sys._getframe(2)
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename == TEMPLATE_BASE and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f"{origin.template_name}:{token.lineno}"
+        elif filename.startswith(base_dir) and filename != __file__ and 'site-packages' not in filename:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return 'desconocido'
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []  # (sql, ms, sitio)
+        self.template_ms = 0.0
+        self._rendering = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de Django: envuelve cada consulta de la conexión
+        site = callSite()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000, site))
+
+    @property
+    def db_ms(self):
+        return sum(ms for _, ms, _ in self.queries)
+
+    def totalMs(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def slowest(self, limit):
+        return [
+            {'sql': sql[:500], 'ms': round(ms, 3), 'site': site}
+            for sql, ms, site in sorted(self.queries, key=lambda query: query[1], reverse=True)[:limit]
+        ]
+
+    def duplicates(self, threshold):
+        # la misma consulta (sin parámetros) lanzada varias veces desde el mismo sitio
+        counts = Counter((sql, site) for sql, _, site in self.queries)
+        return [
+            {'sql': sql[:500], 'site': site, 'count': count}
+            for (sql, site), count in counts.most_common() if count >= threshold
+        ]
+
+    def serverTiming(self, total_ms):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{len(self.queries)} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        # sólo medimos el render más externo; los includes ya van dentro
+        metrics._rendering += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics._rendering -= 1
+            if not metrics._rendering:
+                metrics.template_ms += (time.perf_counter() - started) * 1000
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class SqlInstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        total_ms = metrics.totalMs()
+        response['Server-Timing'] = metrics.serverTiming(total_ms)
+        self.report(request, response, metrics, total_ms)
+        return response
+
+    def report(self, request, response, metrics, total_ms):
+        duplicates = metrics.duplicates(getattr(settings, 'SQL_DUPLICATE_THRESHOLD', 5))
+        slow = total_ms >= getattr(settings, 'SQL_SLOW_REQUEST_MS', 500)
+        too_many = len(metrics.queries) >= getattr(settings, 'SQL_SLOW_QUERY_COUNT', 50)
+        if not (slow or too_many or duplicates):
+            return
+        match = getattr(request, 'resolver_match', None)
+        payload = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'db_ms': round(metrics.db_ms, 3),
+            'template_ms': round(metrics.template_ms, 3),
+            'queries': len(metrics.queries),
+            'slowest': metrics.slowest(getattr(settings, 'SQL_SLOWEST_QUERIES', 5)),
+            'duplicates': duplicates,
+        }
+        logger.warning("slow request %s", json.dumps(payload), extra={'performance': payload})
@@ -44,11 +44,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'GameRank.instrumentation.SqlInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'explore.profiling.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +59,9 @@ ROOT_URLCONF = 'GameRank.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # como DjangoTemplates, pero mide el tiempo de render para SqlInstrumentationMiddleware
+        'BACKEND': 'GameRank.instrumentation.InstrumentedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,6 +88,86 @@ DATABASES = {
     }
 }
 
+# Perfil de producción para SQLite (GAMERANK_SQLITE_PRODUCTION=1): WAL para que las
+# lecturas no esperen a las escrituras, busy_timeout en vez de "database is locked",
+# synchronous=NORMAL (seguro con WAL), mmap y caché de páginas más grandes, y
+# transacciones IMMEDIATE para que dos escritores no choquen al pasar de leer a escribir.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negativo = KiB
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+}
+
+if os.environ.get('GAMERANK_SQLITE_PRODUCTION') == '1':
+    DATABASES['default'].update(
+        OPTIONS=SQLITE_PRODUCTION_OPTIONS,
+        # conexiones persistentes: los pragmas se aplican una vez por conexión
+        CONN_MAX_AGE=int(os.environ.get('GAMERANK_CONN_MAX_AGE', 600)),
+        CONN_HEALTH_CHECKS=True,
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Segundos que duran en caché los contadores globales del pie de página
+SITE_COUNTERS_TTL = 300
+
+# Segundos que se guarda el JSON serializado de cada versión de un juego (gameJson)
+GAME_JSON_CACHE_TTL = 24 * 3600
+
+# Segundos que se guarda cada tarjeta renderizada del explorador (por juego y versión)
+CARD_CACHE_TTL = 24 * 3600
+
+
+# Instrumentación SQL por petición (GAMERANK_SQL_INSTRUMENTATION=1): cabecera
+# Server-Timing y log gamerank.performance para las peticiones que pasen de los umbrales
+SQL_INSTRUMENTATION = os.environ.get('GAMERANK_SQL_INSTRUMENTATION') == '1'
+SQL_SLOW_REQUEST_MS = int(os.environ.get('GAMERANK_SQL_SLOW_REQUEST_MS', 500))
+SQL_SLOW_QUERY_COUNT = 50
+# veces que se puede repetir la misma consulta desde el mismo sitio antes de avisar de un N+1
+SQL_DUPLICATE_THRESHOLD = 5
+SQL_SLOWEST_QUERIES = 5
+
+# Votos "ficticios" con la media de la partición que suma la puntuación bayesiana de
+# las clasificaciones: cuanto mayor, más votos necesita un juego para despegarse de la media
+LEADERBOARD_PRIOR_VOTES = 5
+
+# Juegos similares (`manage.py similargames`): vecinos guardados por juego, nota mínima
+# para contar un voto como "me gusta" y jugadores en común necesarios
+SIMILAR_GAMES_K = 10
+SIMILAR_GAMES_MIN_SCORE = 4
+SIMILAR_GAMES_MIN_COMMON = 2
+
+# Profiler por muestreo bajo demanda (staff, ?_profile=1): segundos entre muestras y
+# cuántos perfiles se conservan
+REQUEST_PROFILER_INTERVAL = 0.001
+REQUEST_PROFILES_KEEP = 200
+
+# Caché local de miniaturas (explore/thumbnails.py): función que descarga cada imagen
+# (se puede sustituir por un origen local en tests), ancho de las variantes de tarjeta,
+# tamaño máximo, timeout y descargas en paralelo. Se rellenan al sincronizar el catálogo
+THUMBNAIL_FETCHER = 'explore.thumbnails.urlFetcher'
+THUMBNAIL_CARD_WIDTH = 400
+THUMBNAIL_MAX_BYTES = 5 * 1024 * 1024
+THUMBNAIL_TIMEOUT = 10
+THUMBNAIL_WORKERS = 8
+THUMBNAIL_CACHE_ON_SYNC = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,6 +205,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# collectstatic deja aquí los estáticos con el hash del contenido en el nombre y sus
+# variantes .gz/.br (GameRank/staticfiles.py); sin DEBUG los sirve la propia app con
+# caché "immutable"
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'GameRank.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# Ficheros generados por la aplicación (miniaturas en caché)
+MEDIA_ROOT = BASE_DIR / 'media'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -133,3 +229,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 SESSION_COOKIE_AGE = 3600
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
+
+# Listados del catálogo que sincroniza `manage.py syncgames` (admite http(s):// y file://)
+CATALOG_SOURCES = [
+    {
+        'name': 'listado1',
+        'url': os.environ.get('GAMERANK_LISTADO1_URL', 'https://gitlab.eif.urjc.es/cursosweb/2024-2025/final-gamerank/raw/main/listado1.xml'),
+        'format': 'xml',
+        'prefix': 'LIS1-',
+    },
+    {
+        'name': 'freetogame',
+        'url': os.environ.get('GAMERANK_FREETOGAME_URL', 'https://www.freetogame.com/api/games'),
+        'format': 'json',
+        'prefix': 'LIS2-',
+    },
+    {
+        'name': 'mmobomb',
+        'url': os.environ.get('GAMERANK_MMOBOMB_URL', 'https://www.mmobomb.com/api1/games'),
+        'format': 'json',
+        'prefix': 'LIS3-',
+    },
+]
+
+# Circuit breaker de la sincronización: fallos seguidos antes de abrirlo y segundos de espera
+CATALOG_BREAKER_THRESHOLD = 3
+CATALOG_BREAKER_COOLDOWN = 300
+
+# Comentarios en directo por Server-Sent Events. Sólo tiene sentido sirviendo con ASGI
+# (p. ej. `uvicorn GameRank.asgi:application`); con WSGI se sigue usando el polling de 30s
+LIVE_COMMENTS = os.environ.get('GAMERANK_LIVE_COMMENTS') == '1'
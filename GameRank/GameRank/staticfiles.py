@@ -0,0 +1,125 @@
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli sólo se generan los .gz
+    brotli = None
+
+# ------------------------------
+#   ESTÁTICOS CON HASH Y PRECOMPRIMIDOS
+# ------------------------------
+# collectstatic copia los estáticos (sb-admin, css, imágenes, admin) a STATIC_ROOT con el
+# hash del contenido en el nombre y deja al lado un .gz (y un .br si brotli está
+# instalado) de cada fichero de texto. serveStatic entrega la variante comprimida que
+# acepte el navegador; los nombres con hash no cambian nunca de contenido, así que se
+# sirven con caché "immutable" y las visitas repetidas no revalidan nada.
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico'}
+COMPRESS_MIN_SIZE = 256
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# nombres sin hash (p. ej. pedidos a mano): caché corta y revalidación por fecha
+UNHASHED_MAX_AGE = 60
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def compressVariants(data):
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return variants
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # ya con los nombres finales: originales y copias con hash
+        for name in set(self.hashed_files) | set(self.hashed_files.values()):
+            self.compressFile(name)
+
+    def compressFile(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        for suffix, compressed in compressVariants(data).items():
+            # si apenas reduce no merece la pena guardar ni servir la variante
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+    def stored_name(self, name):
+        # sin manifest (no se ha ejecutado collectstatic: desarrollo y tests) usamos los
+        # nombres originales en vez de fallar al pintar {% static %}
+        if not self.hashed_files and not self.exists(self.manifest_name):
+            return name
+        return super().stored_name(name)
+
+    def isHashed(self, name):
+        # conjunto de nombres con hash, recalculado sólo cuando cambia el manifest
+        if getattr(self, '_hashed_names_of', None) is not self.hashed_files:
+            self._hashed_names = set(self.hashed_files.values())
+            self._hashed_names_of = self.hashed_files
+        return name in self._hashed_names
+
+def acceptedEncodings(request):
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        try:
+            if params.startswith('q=') and float(params[2:]) == 0:
+                continue  # q=0: el navegador la rechaza expresamente
+        except ValueError:
+            pass
+        accepted.add(coding.strip().lower())
+    return accepted
+
+def serveStatic(request, path):
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    name = path.replace('\\', '/')
+    hashed = getattr(staticfiles_storage, 'isHashed', lambda name: False)(name)
+    stat = os.stat(fullpath)
+    if not hashed and not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    accepted = acceptedEncodings(request)
+    served, encoding = fullpath, None
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(fullpath + suffix):
+            served, encoding = fullpath + suffix, coding
+            break
+    response = FileResponse(open(served, 'rb'), content_type=content_type)
+    response.headers.pop('Content-Disposition', None)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if os.path.isfile(fullpath + '.gz') or os.path.isfile(fullpath + '.br'):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if hashed:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        patch_cache_control(response, public=True, max_age=UNHASHED_MAX_AGE)
+    return response
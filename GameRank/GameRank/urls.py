@@ -14,10 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import include, path
-from django.conf.urls.static import static
+from django.urls import include, path, re_path
 from django.conf import settings
+from GameRank.staticfiles import serveStatic
 
 urlpatterns = [
     path("", include('explore.urls')),
@@ -27,6 +29,9 @@ urlpatterns = [
 ]
 
 if not settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    # sin DEBUG los estáticos de collectstatic (con hash y precomprimidos) los sirve la app
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.STATIC_URL.lstrip('/')), serveStatic, name='static'),
+    ]
 
 
@@ -1,9 +1,42 @@
 from django.contrib import admin
-from .models import Game, Comment, Rating, FollowedGame
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import Game, Comment, Rating, FollowedGame, SyncState, UserStats, RequestProfile
 
 admin.site.register(Game)
 admin.site.register(Comment)
 admin.site.register(Rating)
 admin.site.register(FollowedGame)
+admin.site.register(SyncState)
+admin.site.register(UserStats)
 
-# Register your models here.
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status', 'duration_ms', 'samples', 'download')
+    list_filter = ('view_name',)
+    readonly_fields = [field.name for field in RequestProfile._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:profile_id>/collapsed/', self.admin_site.admin_view(self.downloadCollapsed),
+                 name='explore_requestprofile_collapsed'),
+        ] + super().get_urls()
+
+    def downloadCollapsed(self, request, profile_id):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        profile = get_object_or_404(RequestProfile, pk=profile_id)
+        response = HttpResponse(profile.collapsed, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.id}.folded"'
+        return response
+
+    @admin.display(description='Pilas')
+    def download(self, profile):
+        return format_html('<a href="{}">descargar</a>',
+                           reverse('admin:explore_requestprofile_collapsed', args=[profile.id]))
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ExploreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'explore'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from .search import installSearchIndex
+        post_migrate.connect(installSearchIndex, sender=self)
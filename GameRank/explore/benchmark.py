@@ -0,0 +1,190 @@
+import random
+import sqlite3
+import time
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import facets, leaderboards, search, stats
+from .models import Comment, CommentReaction, FollowedGame, Game, Rating, normalizeTitle
+from .pagination import encodeCursor
+
+SEED_BATCH_SIZE = 5000
+PAGE_SIZE = 21
+GENRES = ('Shooter', 'MMORPG', 'Strategy', 'Card Game', 'Racing', 'Sports', 'Fighting', 'MOBA')
+PLATFORMS = ('PC (Windows)', 'Web Browser', 'PC (Windows), Web Browser')
+WORDS = ('dragon', 'legends', 'war', 'galaxy', 'arena', 'empire', 'shadow', 'racing', 'tactics', 'online',
+         'heroes', 'kingdom', 'battle', 'space', 'dungeon', 'fantasy', 'zombie', 'league', 'craft', 'quest')
+
+# ------------------------------
+#   BENCHMARK DE LAS VISTAS
+# ------------------------------
+# seedData llena la base de datos con datos sintéticos (mismas tablas y agregados que
+# en producción) y runBenchmark pide cada vista con el cliente de test, midiendo
+# latencia y número de consultas SQL. Lo usa `manage.py benchmark` sobre una base de
+# datos de test desechable.
+
+def batched(objects, model):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= SEED_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+def pickPerUser(user_ids, target_ids, total, rng):
+    # reparte `total` pares (usuario, objetivo) sin repetir objetivo por usuario,
+    # respetando los unique_together de valoraciones, seguidos y reacciones
+    if not user_ids or not target_ids:
+        return
+    per_user, extra = divmod(total, len(user_ids))
+    for i, user_id in enumerate(user_ids):
+        k = min(per_user + (1 if i < extra else 0), len(target_ids))
+        for target_id in rng.sample(target_ids, k):
+            yield user_id, target_id
+
+def seedData(games=1000, users=100, ratings=10000, comments=5000, reactions=5000, follows=1000, seed=0):
+    rng = random.Random(seed)
+    now = timezone.now()
+    with transaction.atomic():
+        password = make_password('benchmark')
+        batched((User(username=f'bench{i}', password=password) for i in range(users)), User)
+
+        def buildGame(i):
+            title = ' '.join(rng.sample(WORDS, 3)).title() + f' {i}'
+            return Game(
+                source_id=f'BENCH-{i}', title=title, normalized_title=normalizeTitle(title),
+                thumbnail=f'https://example.com/thumb/{i}.jpg', genre=rng.choice(GENRES),
+                platform=rng.choice(PLATFORMS), developer=f'Studio {i % 500}', publisher=f'Publisher {i % 200}',
+                release_date=f'20{rng.randint(0, 24):02d}-01-01', description=' '.join(rng.choices(WORDS, k=30)),
+                url=f'https://example.com/game/{i}', updated_at=now,
+            )
+        batched((buildGame(i) for i in range(games)), Game)
+
+        user_ids = list(User.objects.filter(username__startswith='bench').values_list('id', flat=True))
+        game_ids = list(Game.objects.filter(source_id__startswith='BENCH-').values_list('id', flat=True))
+        batched((Rating(user_id=u, game_id=g, score=rng.randint(0, 5))
+                 for u, g in pickPerUser(user_ids, game_ids, ratings, rng)), Rating)
+        batched((FollowedGame(user_id=u, game_id=g)
+                 for u, g in pickPerUser(user_ids, game_ids, follows, rng)), FollowedGame)
+        if user_ids and game_ids:
+            batched((Comment(user_id=rng.choice(user_ids), game_id=rng.choice(game_ids),
+                             text=' '.join(rng.choices(WORDS, k=12)), created_at=now)
+                     for _ in range(comments)), Comment)
+        comment_ids = list(Comment.objects.values_list('id', flat=True))
+        batched((CommentReaction(user_id=u, comment_id=c, is_like=rng.random() < 0.7)
+                 for u, c in pickPerUser(user_ids, comment_ids, reactions, rng)), CommentReaction)
+
+        # bulk_create no pasa por las vistas: recalculamos los agregados como rebuildstats
+        stats.rebuildGameRatings()
+        leaderboards.rebuildLeaderboards()
+        stats.rebuildGameComments()
+        stats.rebuildCommentReactions()
+        stats.rebuildUserStats()
+        facets.rebuildFacetCounts()
+        search.rebuildSearchIndex()
+    return {'games': games, 'users': users, 'ratings': ratings, 'comments': comments,
+            'reactions': reactions, 'follows': follows}
+
+def deepCursor(depth):
+    # cursor de la página `depth` del explorador, como si el usuario hubiera hecho scroll
+    game = Game.objects.order_by('-bayes_score', '-id').values('bayes_score', 'id')[depth * PAGE_SIZE:depth * PAGE_SIZE + 1].first()
+    return encodeCursor([game['bayes_score'], game['id']]) if game else ''
+
+def benchmarkTargets(rng, depth):
+    # cada vista es una función que devuelve la URL de la siguiente petición, para no
+    # pedir siempre el mismo juego y medir sólo la caché
+    source_ids = list(Game.objects.values_list('source_id', flat=True).order_by('id'))
+    commented = list(Game.objects.filter(comment_count__gt=0).values_list('source_id', flat=True).order_by('id')) or source_ids
+    cursor = deepCursor(depth)
+    return {
+        'index': lambda: reverse('explore'),
+        'index_search': lambda: f"{reverse('explore')}?q={rng.choice(WORDS)}",
+        'index_deep': lambda: f"{reverse('explore')}?cursor={cursor}",
+        'details': lambda: reverse('details', args=[rng.choice(source_ids)]),
+        'comments_partial': lambda: reverse('comments_partial', args=[rng.choice(commented)]),
+        'game_json': lambda: reverse('game_json', args=[rng.choice(source_ids)]),
+        'user_games_voted': lambda: reverse('user_games', args=['voted']),
+        'user_games_followed': lambda: reverse('user_games', args=['followed']),
+        'profile': lambda: reverse('user_profile'),
+    }
+
+def percentile(values, pct):
+    # percentil por rango más cercano sobre valores ya ordenados
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+def summarize(timings, queries, statuses):
+    timings = sorted(timings)
+    queries = sorted(queries)
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3) if timings else 0.0,
+        'queries_p50': percentile(queries, 50),
+        'queries_max': queries[-1] if queries else 0,
+        'statuses': sorted(set(statuses)),
+    }
+
+def runBenchmark(views=None, iterations=50, depth=200, cold=False, seed=0):
+    rng = random.Random(seed)
+    targets = benchmarkTargets(rng, depth)
+    if views:
+        targets = {name: target for name, target in targets.items() if name in views}
+    client = Client()
+    # el usuario con más actividad, para que biblioteca y perfil tengan contenido
+    user = User.objects.order_by('-stats__votes', 'id').first()
+    if user is not None:
+        client.force_login(user)
+    results = {}
+    for name, target in targets.items():
+        timings, queries, statuses = [], [], []
+        for _ in range(iterations):
+            url = target()
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            statuses.append(response.status_code)
+        results[name] = summarize(timings, queries, statuses)
+    return results
+
+def benchmarkReport(data, results, iterations, cold):
+    return {
+        'created_at': timezone.now().isoformat(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'vendor': connection.vendor,
+        'iterations': iterations,
+        'cold_cache': cold,
+        'data': data,
+        'views': results,
+    }
+
+def compareReports(baseline, current):
+    # variación del p95 y de las consultas respecto a una ejecución anterior
+    rows = []
+    for name, result in current['views'].items():
+        previous = baseline.get('views', {}).get(name)
+        if previous is None:
+            continue
+        ratio = result['p95_ms'] / previous['p95_ms'] if previous['p95_ms'] else 0.0
+        rows.append((name, previous['p95_ms'], result['p95_ms'], ratio,
+                     previous['queries_p50'], result['queries_p50']))
+    return rows
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Comment, Game
+
+# ------------------------------
+#   CONTADORES GLOBALES EN CACHÉ
+# ------------------------------
+# Totales que se pintan en el pie de todas las páginas. Se invalidan explícitamente al
+# crear/borrar (señales y sincronización del catálogo) y caducan solos a los
+# SITE_COUNTERS_TTL segundos por si algún cambio no pasa por ahí.
+
+SITE_COUNTERS = {
+    'total_games': Game,
+    'total_comments': Comment,
+}
+
+def cacheKey(name):
+    return f'site-counter:{name}'
+
+def siteCounter(name):
+    value = cache.get(cacheKey(name))
+    if value is None:
+        value = SITE_COUNTERS[name].objects.count()
+        cache.set(cacheKey(name), value, settings.SITE_COUNTERS_TTL)
+    return value
+
+def invalidateSiteCounters(*names):
+    # se borra ya y otra vez tras el commit, por si otra petición ha vuelto a cachear
+    # el valor antiguo entre medias
+    keys = [cacheKey(name) for name in names or SITE_COUNTERS]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,48 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Game
+
+# ------------------------------
+#   EXPORTACIÓN DEL CATÁLOGO
+# ------------------------------
+# Recorre el catálogo por trozos de id creciente (sin OFFSET ni cargarlo entero) y lo
+# serializa juego a juego, así la memoria no depende del tamaño del catálogo.
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = ('ndjson', 'json')
+
+def iterGames(since=None, chunk_size=None):
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    games = Game.objects.order_by('id')
+    if since is not None:
+        games = games.filter(updated_at__gte=since)
+    last_id = 0
+    while True:
+        chunk = list(games.filter(id__gt=last_id).prefetch_related('similar_entries__similar')[:chunk_size])
+        if not chunk:
+            return
+        for game in chunk:
+            data = game.jsonData()
+            data['updated_at'] = game.updated_at
+            yield data
+        last_id = chunk[-1].id
+
+def ndjsonLines(games):
+    for data in games:
+        yield json.dumps(data, cls=DjangoJSONEncoder) + '\n'
+
+def jsonArrayChunks(games):
+    yield '['
+    separator = '\n'
+    for data in games:
+        yield separator + json.dumps(data, cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield '\n]\n'
+
+def exportChunks(export_format='ndjson', since=None):
+    games = iterGames(since)
+    if export_format == 'json':
+        return jsonArrayChunks(games)
+    return ndjsonLines(games)
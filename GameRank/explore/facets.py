@@ -0,0 +1,86 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import FacetCount, Game
+
+# ------------------------------
+#   FACETAS (GÉNERO Y PLATAFORMA)
+# ------------------------------
+# FacetCount guarda cuántos juegos hay por cada par (género, plataforma). Es una tabla
+# pequeña (géneros × plataformas), así que los contadores del explorador sin búsqueda
+# salen de sumar unas pocas filas en vez de agrupar todo el catálogo. Con búsqueda de
+# texto se agrupa sólo el subconjunto que casa. La mantienen las altas y bajas de juegos
+# (señales, save() y la sincronización) y rebuildFacetCounts la recalcula desde cero.
+
+FACET_FIELDS = ('genre', 'platform')
+
+def applyFacetDeltas(deltas):
+    # deltas: Counter {(género, plataforma): +n/-n}
+    touched = []
+    with transaction.atomic():
+        for (genre, platform), delta in deltas.items():
+            if not delta:
+                continue
+            facet, created = FacetCount.objects.get_or_create(
+                genre=genre, platform=platform, defaults={'count': delta}
+            )
+            if not created:
+                FacetCount.objects.filter(pk=facet.pk).update(count=F('count') + delta)
+            touched.append(facet.pk)
+        FacetCount.objects.filter(pk__in=touched, count__lte=0).delete()
+
+def countNewGames(games):
+    return Counter((game.genre, game.platform) for game in games)
+
+def rebuildFacetCounts():
+    rows = Game.objects.order_by().values_list('genre', 'platform').annotate(total=Count('id'))
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create([
+            FacetCount(genre=genre, platform=platform, count=total) for genre, platform, total in rows
+        ])
+
+def facetCounts(searched=None, filters=None):
+    # cada faceta se cuenta con los demás filtros pero no con el suyo, para poder
+    # cambiar de valor sin quitar antes el filtro
+    filters = filters or {}
+    facets = {}
+    for field in FACET_FIELDS:
+        if searched is None:
+            rows, total = FacetCount.objects.all(), Sum('count')
+        else:
+            rows, total = searched, Count('id')
+        others = {other: value for other, value in filters.items() if other != field and value}
+        rows = rows.filter(**others).exclude(**{field: ''})
+        facets[field] = list(
+            rows.order_by().values_list(field).annotate(total=total).order_by('-total', field)
+        )
+    return facets
+
+def facetUrl(request, field, value=None):
+    # misma búsqueda y filtros cambiando sólo esta faceta (sin valor la quita), desde la primera página
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+    if value is None:
+        params.pop(field, None)
+    else:
+        params[field] = value
+    return f"{request.path}?{params.urlencode()}"
+
+def facetLinks(request, facets, filters):
+    links = {}
+    for field, rows in facets.items():
+        selected = filters.get(field)
+        links[field] = [
+            {'value': value, 'count': total, 'active': value == selected,
+             'url': facetUrl(request, field, None if value == selected else value)}
+            for value, total in rows
+        ]
+        if selected and not any(link['active'] for link in links[field]):
+            # filtro sin resultados con el resto de condiciones: lo mostramos para poder quitarlo
+            links[field].insert(0, {'value': selected, 'count': 0, 'active': True,
+                                    'url': facetUrl(request, field)})
+    return links
@@ -0,0 +1,158 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Game, Leaderboard, LeaderboardEntry
+
+# ------------------------------
+#   CLASIFICACIONES BAYESIANAS
+# ------------------------------
+# score = (C·m + suma) / (C + votos): con pocos votos el juego se queda cerca de la media
+# m de su partición y sólo se separa de ella a medida que acumula votos (C es
+# LEADERBOARD_PRIOR_VOTES). Cada juego con votos tiene una fila por partición (global,
+# su género y su plataforma) con su puntuación. No guardamos la posición: "top N" es una
+# lectura por leaderboard_score_idx y la posición de un juego es 1 + los que tiene por
+# delante, un COUNT sobre el mismo índice. Así un voto sólo escribe las filas del juego
+# votado, sin desplazar (ni invalidar en caché) al resto. La media m sale de la suma y el
+# número de votos de cada partición (Leaderboard), que cada voto actualiza con F(); las
+# puntuaciones de los demás juegos se calcularon con la media de su último voto, así que
+# rebuildLeaderboards (rebuildstats, p. ej. a diario desde cron) las vuelve a alinear.
+
+LEADERBOARD_KINDS = ('global', 'genre', 'platform')
+REBUILD_BATCH_SIZE = 1000
+
+def priorVotes():
+    return getattr(settings, 'LEADERBOARD_PRIOR_VOTES', 5)
+
+def bayesScore(rating_sum, rating_count, prior_mean, prior_votes):
+    if not rating_count:
+        return 0.0
+    return (prior_votes * prior_mean + rating_sum) / (prior_votes + rating_count)
+
+def partitionsFor(genre, platform):
+    partitions = [('global', '')]
+    if genre:
+        partitions.append(('genre', genre))
+    if platform:
+        partitions.append(('platform', platform))
+    return partitions
+
+def computeLeaderboards(rows, prior_votes):
+    # rows: (id, género, plataforma, suma, votos) de los juegos con votos.
+    # Devuelve los votos (suma, número) de cada partición y las filas
+    # (kind, value, game_id, score, suma, votos)
+    totals = defaultdict(lambda: [0, 0])
+    members = defaultdict(list)
+    for game_id, genre, platform, rating_sum, rating_count in rows:
+        for partition in partitionsFor(genre, platform):
+            totals[partition][0] += rating_sum
+            totals[partition][1] += rating_count
+            members[partition].append((game_id, rating_sum, rating_count))
+    priors = {partition: total / count if count else 0.0 for partition, (total, count) in totals.items()}
+    entries = [
+        (kind, value, game_id, bayesScore(rating_sum, rating_count, priors[(kind, value)], prior_votes),
+         rating_sum, rating_count)
+        for (kind, value), games in members.items()
+        for game_id, rating_sum, rating_count in games
+    ]
+    return dict(totals), entries
+
+def rebuildLeaderboards():
+    rows = Game.objects.filter(rating_count__gt=0).values_list(
+        'id', 'genre', 'platform', 'rating_sum', 'rating_count'
+    )
+    totals, entries = computeLeaderboards(rows, priorVotes())
+    now = timezone.now()
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        Leaderboard.objects.all().delete()
+        Leaderboard.objects.bulk_create([
+            Leaderboard(kind=kind, value=value, rating_sum=total, rating_count=count, rebuilt_at=now)
+            for (kind, value), (total, count) in totals.items()
+        ], batch_size=REBUILD_BATCH_SIZE)
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(kind=kind, value=value, game_id=game_id, score=score,
+                             rating_sum=rating_sum, rating_count=rating_count)
+            for kind, value, game_id, score, rating_sum, rating_count in entries
+        ], batch_size=REBUILD_BATCH_SIZE)
+
+        # sólo tocamos (y subimos de versión) los juegos cuya puntuación global cambia
+        scores = {game_id: score for kind, _, game_id, score, _, _ in entries if kind == 'global'}
+        changed = sorted(
+            game_id for game_id, bayes_score in Game.objects.values_list('id', 'bayes_score').iterator()
+            if scores.get(game_id, 0.0) != bayes_score
+        )
+        for i in range(0, len(changed), REBUILD_BATCH_SIZE):
+            games = list(Game.objects.filter(id__in=changed[i:i + REBUILD_BATCH_SIZE]).only('id'))
+            for game in games:
+                game.bayes_score = scores.get(game.id, 0.0)
+                game.version = F('version') + 1
+                game.updated_at = now
+            Game.objects.bulk_update(games, ['bayes_score', 'version', 'updated_at'])
+
+def ahead(score, game_id):
+    # entradas por delante de (score, game_id): más puntuación o empate con id menor
+    return Q(score__gt=score) | Q(score=score, game_id__lt=game_id)
+
+def rankOf(kind, value, score, game_id):
+    return 1 + LeaderboardEntry.objects.filter(ahead(score, game_id), kind=kind, value=value).count()
+
+def addVotes(kind, value, sum_delta, count_delta):
+    # suma los votos a la partición (la crea si es nueva) y devuelve su media actualizada
+    board, _ = Leaderboard.objects.get_or_create(kind=kind, value=value)
+    if sum_delta or count_delta:
+        Leaderboard.objects.filter(pk=board.pk).update(
+            rating_sum=F('rating_sum') + sum_delta, rating_count=F('rating_count') + count_delta
+        )
+        board.refresh_from_db(fields=['rating_sum', 'rating_count'])
+    return board.priorMean()
+
+def updateGameRanks(game_id):
+    # sólo se escriben las filas del propio juego; la versión ya la sube quien cambia sus votos
+    game = Game.objects.filter(pk=game_id).values('genre', 'platform', 'rating_sum', 'rating_count').first()
+    with transaction.atomic():
+        entries = {(entry.kind, entry.value): entry for entry in LeaderboardEntry.objects.filter(game_id=game_id)}
+        wanted = []
+        if game is not None and game['rating_count']:
+            wanted = partitionsFor(game['genre'], game['platform'])
+        for (kind, value), entry in entries.items():
+            if (kind, value) not in wanted:
+                addVotes(kind, value, -entry.rating_sum, -entry.rating_count)
+                entry.delete()
+        global_score = 0.0
+        prior_votes = priorVotes()
+        for kind, value in wanted:
+            entry = entries.get((kind, value))
+            counted_sum, counted_count = (entry.rating_sum, entry.rating_count) if entry else (0, 0)
+            prior = addVotes(kind, value, game['rating_sum'] - counted_sum, game['rating_count'] - counted_count)
+            score = bayesScore(game['rating_sum'], game['rating_count'], prior, prior_votes)
+            LeaderboardEntry.objects.update_or_create(
+                kind=kind, value=value, game_id=game_id,
+                defaults={'score': score, 'rating_sum': game['rating_sum'], 'rating_count': game['rating_count']},
+            )
+            if kind == 'global':
+                global_score = score
+        if game is not None:
+            Game.objects.filter(pk=game_id).update(bayes_score=global_score)
+
+def removeGame(game_id):
+    with transaction.atomic():
+        for entry in LeaderboardEntry.objects.filter(game_id=game_id):
+            addVotes(entry.kind, entry.value, -entry.rating_sum, -entry.rating_count)
+            entry.delete()
+
+def topGames(kind='global', value='', limit=10):
+    return Game.objects.filter(
+        leaderboard_entries__kind=kind, leaderboard_entries__value=value
+    ).order_by('-leaderboard_entries__score', 'id')[:limit]
+
+def gameRanks(game):
+    # {'global': {'value': '', 'rank': 3, 'score': 4.1}, 'genre': {...}, ...}
+    return {
+        entry.kind: {'value': entry.value, 'rank': rankOf(entry.kind, entry.value, entry.score, entry.game_id),
+                     'score': entry.score}
+        for entry in game.leaderboard_entries.all()
+    }
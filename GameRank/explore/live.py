@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+# ------------------------------
+#   COMENTARIOS EN DIRECTO (SSE)
+# ------------------------------
+# Pub/sub en memoria del proceso: cada conexión SSE abierta es una corrutina con su
+# cola, sin hilo propio, así que un worker ASGI aguanta miles de conexiones ociosas.
+# Las vistas síncronas publican desde su hilo y el aviso se entrega en el event loop
+# de cada suscriptor con call_soon_threadsafe.
+
+QUEUE_SIZE = 8
+
+
+class CommentBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # game_id -> {cola: loop}
+
+    def subscribe(self, game_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(game_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, game_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(game_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(game_id, None)
+
+    def subscriberCount(self, game_id=None):
+        with self._lock:
+            if game_id is not None:
+                return len(self._subscribers.get(game_id, {}))
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, game_id, version):
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, {}).items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, version)
+            except RuntimeError:
+                # el loop de esa conexión ya se ha cerrado
+                self.unsubscribe(game_id, queue)
+
+    @staticmethod
+    def _offer(queue, version):
+        # los avisos sólo dicen "hay versión nueva": si el cliente va lento
+        # descartamos los más antiguos en vez de acumularlos
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(version)
+
+
+broker = CommentBroker()
@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from explore.benchmark import benchmarkReport, compareReports, runBenchmark, seedData
+
+
+class Command(BaseCommand):
+    help = "Mide latencia y consultas SQL de las vistas principales sobre una base de datos de test con datos sintéticos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--ratings', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=500000)
+        parser.add_argument('--reactions', type=int, default=500000)
+        parser.add_argument('--follows', type=int, default=100000)
+        parser.add_argument('--iterations', type=int, default=50, help="Peticiones por vista")
+        parser.add_argument('--depth', type=int, default=200, help="Página del explorador para index_deep")
+        parser.add_argument('--view', action='append', dest='views', help="Vista a medir (se puede repetir)")
+        parser.add_argument('--cold', action='store_true', help="Vacía la caché antes de cada petición")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Fichero JSON donde guardar los resultados")
+        parser.add_argument('--baseline', help="Resultados JSON de una ejecución anterior para comparar")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations debe ser mayor que 0")
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as fp:
+                baseline = json.load(fp)
+        # nunca tocamos la base de datos real: creamos una de test y la borramos al final
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            data = seedData(
+                games=options['games'], users=options['users'], ratings=options['ratings'],
+                comments=options['comments'], reactions=options['reactions'],
+                follows=options['follows'], seed=options['seed'],
+            )
+            self.stdout.write(f"Datos sintéticos generados en {time.perf_counter() - started:.1f} s")
+            results = runBenchmark(options['views'], options['iterations'], options['depth'],
+                                   options['cold'], options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = benchmarkReport(data, results, options['iterations'], options['cold'])
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+                f"p99 {result['p99_ms']:.1f} ms, {result['queries_p50']} consultas (máx. {result['queries_max']}), "
+                f"estados {result['statuses']}"
+            )
+        if baseline is not None:
+            for name, old_p95, new_p95, ratio, old_queries, new_queries in compareReports(baseline, report):
+                self.stdout.write(f"{name}: p95 {old_p95:.1f} -> {new_p95:.1f} ms (x{ratio:.2f}), "
+                                  f"consultas {old_queries} -> {new_queries}")
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fp:
+                json.dump(report, fp, indent=2)
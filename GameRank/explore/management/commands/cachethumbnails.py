@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from explore.thumbnails import cacheThumbnails
+
+
+class Command(BaseCommand):
+    help = "Descarga y guarda en local las miniaturas pendientes (variantes WebP/JPEG de tarjeta)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Reintenta también las miniaturas que fallaron antes")
+
+    def handle(self, *args, **options):
+        cached, failed = cacheThumbnails(retry_failed=options['retry_failed'])
+        self.stdout.write(f"Miniaturas: {cached} guardadas, {failed} fallidas")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from explore.export import EXPORT_FORMATS, exportChunks
+
+
+class Command(BaseCommand):
+    help = "Exporta el catálogo con sus agregados en NDJSON o JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--since', help="Sólo juegos modificados desde esta fecha ISO 8601")
+        parser.add_argument('--output', help="Fichero de salida (por defecto la salida estándar)")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_datetime(options['since'])
+            except ValueError:  # bien formada pero imposible (mes 13, día 45...)
+                since = None
+            if since is None:
+                raise CommandError("--since debe ser una fecha ISO 8601")
+        chunks = exportChunks(options['format'], since)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from explore import facets, leaderboards, search, stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero los agregados desnormalizados y el índice de búsqueda"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stats.rebuildGameRatings()
+            leaderboards.rebuildLeaderboards()
+            stats.rebuildGameComments()
+            stats.rebuildCommentReactions()
+            stats.rebuildUserStats()
+            facets.rebuildFacetCounts()
+            search.rebuildSearchIndex()
+        self.stdout.write("Puntuaciones, clasificaciones, comentarios, reacciones, estadísticas de usuario, facetas e índice de búsqueda recalculados")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from explore import similar
+
+
+class Command(BaseCommand):
+    help = "Recalcula los juegos similares de los juegos cuyos votos han cambiado"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Recalcula todos los juegos, no sólo los que tienen votos nuevos")
+
+    def handle(self, *args, **options):
+        updated = similar.computeSimilarGames(full=options['full'])
+        engine = 'NumPy/SciPy' if similar.np is not None else 'Python'
+        self.stdout.write(f"Juegos similares actualizados en {updated} juegos ({engine})")
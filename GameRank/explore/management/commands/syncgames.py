@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from explore.sync import syncGames
+from explore.thumbnails import cacheThumbnails
+
+
+class Command(BaseCommand):
+    help = "Sincroniza el catálogo de juegos con los listados configurados en CATALOG_SOURCES"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', action='append', dest='sources',
+                            help="Nombre del listado a sincronizar (se puede repetir)")
+        parser.add_argument('--force', action='store_true',
+                            help="Ignora ETag/Last-Modified y descarga siempre")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Segundos entre sincronizaciones; si es 0 se ejecuta una sola vez")
+        parser.add_argument('--no-thumbnails', action='store_true',
+                            help="No descarga las miniaturas de los juegos nuevos")
+
+    def handle(self, *args, **options):
+        while True:
+            for state in syncGames(options['sources'], options['force']):
+                line = (f"{state.source}: {state.last_status} ({state.created_count} juegos nuevos, "
+                        f"descarga {state.fetch_ms:.0f} ms, parseo {state.parse_ms:.0f} ms, "
+                        f"inserción {state.insert_ms:.0f} ms)")
+                if state.last_status == 'error':
+                    self.stderr.write(f"{line} - {state.last_error}")
+                else:
+                    self.stdout.write(line)
+            # miniaturas de los juegos nuevos (o de los que aún no se habían podido descargar)
+            if settings.THUMBNAIL_CACHE_ON_SYNC and not options['no_thumbnails']:
+                cached, failed = cacheThumbnails()
+                if cached or failed:
+                    self.stdout.write(f"miniaturas: {cached} guardadas, {failed} fallidas")
+            if options['interval'] <= 0:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0002_commentreaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('last_sync', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, max_length=20)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_count', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+def fillNormalizedTitles(apps, schema_editor):
+    Game = apps.get_model('explore', 'Game')
+    games = list(Game.objects.only('id', 'title'))
+    for game in games:
+        game.normalized_title = ' '.join((game.title or '').split()).casefold()
+    Game.objects.bulk_update(games, ['normalized_title'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0003_syncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='normalized_title',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fillNormalizedTitles, migrations.RunPython.noop),
+    ]
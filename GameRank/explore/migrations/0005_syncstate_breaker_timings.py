@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0004_game_normalized_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='consecutive_failures',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='fetch_ms',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='insert_ms',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='open_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncstate',
+            name='parse_ms',
+            field=models.FloatField(default=0),
+        ),
+    ]
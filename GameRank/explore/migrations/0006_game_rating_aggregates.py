@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+def fillRatingAggregates(apps, schema_editor):
+    Game = apps.get_model('explore', 'Game')
+    Rating = apps.get_model('explore', 'Rating')
+    totals = Rating.objects.values('game').annotate(total=models.Sum('score'), count=models.Count('id'))
+    for row in totals:
+        Game.objects.filter(pk=row['game']).update(
+            rating_sum=row['total'],
+            rating_count=row['count'],
+            rating_avg=row['total'] / row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0005_syncstate_breaker_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='rating_avg',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fillRatingAggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+def fillReactionCounters(apps, schema_editor):
+    Comment = apps.get_model('explore', 'Comment')
+    CommentReaction = apps.get_model('explore', 'CommentReaction')
+    totals = CommentReaction.objects.values('comment').annotate(
+        likes=models.Count('id', filter=models.Q(is_like=True)),
+        dislikes=models.Count('id', filter=models.Q(is_like=False)),
+    )
+    for row in totals:
+        Comment.objects.filter(pk=row['comment']).update(likes_count=row['likes'], dislikes_count=row['dislikes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0006_game_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='dislikes_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fillReactionCounters, migrations.RunPython.noop),
+    ]
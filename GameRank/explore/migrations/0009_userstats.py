@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('explore', '0008_comment_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('votes', models.IntegerField(default=0)),
+                ('score_sum', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('follows', models.IntegerField(default=0)),
+                ('reactions', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+def fillCommentCounts(apps, schema_editor):
+    Game = apps.get_model('explore', 'Game')
+    Comment = apps.get_model('explore', 'Comment')
+    for row in Comment.objects.values('game').annotate(count=models.Count('id')):
+        Game.objects.filter(pk=row['game']).update(comment_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0009_userstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(fillCommentCounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:48
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fillLeaderboards(apps, schema_editor):
+    # mismo cálculo que leaderboards.rebuildLeaderboards en el momento de esta migración:
+    # score = (C·m + suma) / (C + votos) con m la media de cada partición
+    Game = apps.get_model('explore', 'Game')
+    Leaderboard = apps.get_model('explore', 'Leaderboard')
+    LeaderboardEntry = apps.get_model('explore', 'LeaderboardEntry')
+    prior_votes = getattr(settings, 'LEADERBOARD_PRIOR_VOTES', 5)
+    totals = defaultdict(lambda: [0, 0])
+    members = defaultdict(list)
+    rows = Game.objects.filter(rating_count__gt=0).values_list('id', 'genre', 'platform', 'rating_sum', 'rating_count')
+    for game_id, genre, platform, rating_sum, rating_count in rows:
+        partitions = [('global', '')] + [(kind, value) for kind, value in (('genre', genre), ('platform', platform)) if value]
+        for partition in partitions:
+            totals[partition][0] += rating_sum
+            totals[partition][1] += rating_count
+            members[partition].append((game_id, rating_sum, rating_count))
+    priors = {partition: total / count if count else 0.0 for partition, (total, count) in totals.items()}
+    Leaderboard.objects.bulk_create([
+        Leaderboard(kind=kind, value=value, rating_sum=total, rating_count=count)
+        for (kind, value), (total, count) in totals.items()
+    ])
+    entries = []
+    for (kind, value), games in members.items():
+        prior = priors[(kind, value)]
+        for game_id, rating_sum, rating_count in games:
+            score = (prior_votes * prior + rating_sum) / (prior_votes + rating_count)
+            entries.append(LeaderboardEntry(kind=kind, value=value, game_id=game_id, score=score,
+                                            rating_sum=rating_sum, rating_count=rating_count))
+            if kind == 'global':
+                Game.objects.filter(pk=game_id).update(bayes_score=score)
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0012_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='bayes_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'value')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('score', models.FloatField()),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='leaderboard_entries', to='explore.game')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value', 'score', 'game'], name='leaderboard_score_idx')],
+                'unique_together': {('kind', 'value', 'game')},
+            },
+        ),
+        migrations.RunPython(fillLeaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+def fillFacetCounts(apps, schema_editor):
+    Game = apps.get_model('explore', 'Game')
+    FacetCount = apps.get_model('explore', 'FacetCount')
+    rows = Game.objects.order_by().values_list('genre', 'platform').annotate(total=models.Count('id'))
+    FacetCount.objects.bulk_create([
+        FacetCount(genre=genre, platform=platform, count=total) for genre, platform, total in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0013_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='genre',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='platform',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre', models.CharField(max_length=100)),
+                ('platform', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('genre', 'platform')},
+            },
+        ),
+        migrations.RunPython(fillFacetCounts, migrations.RunPython.noop),
+    ]
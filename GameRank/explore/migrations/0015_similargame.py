@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0014_facetcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='similar_dirty',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='SimilarGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.IntegerField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='explore.game')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='explore.game')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['game', 'rank'], name='similar_game_rank_idx')],
+                'unique_together': {('game', 'similar')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('explore', '0015_similargame'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='thumb_digest',
+            field=models.CharField(blank=True, editable=False, max_length=24),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='thumb_formats',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='thumb_status',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=10),
+        ),
+    ]
@@ -1,5 +1,24 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+
+from .live import broker
+
+def averageExpression(total, count):
+    return models.Case(
+        models.When(GreaterThan(count, 0), then=models.ExpressionWrapper(
+            Cast(total, models.FloatField()) / count, output_field=models.FloatField())),
+        default=models.Value(0.0),
+        output_field=models.FloatField(),
+    )
+
+def normalizeTitle(title):
+    # clave de deduplicado: sin mayúsculas ni espacios sobrantes
+    return ' '.join((title or '').split()).casefold()
 
 # ------------------------------
 #        JUEGO BASE
@@ -7,23 +26,158 @@ from django.contrib.auth.models import User
 class Game(models.Model):
     source_id = models.CharField(max_length=100, unique=True)  # e.g. LIS1-345
     title = models.CharField(max_length=255)
+    normalized_title = models.CharField(max_length=255, db_index=True, editable=False, default='')
     thumbnail = models.URLField()
-    genre = models.CharField(max_length=100)
-    platform = models.CharField(max_length=100)
+    genre = models.CharField(max_length=100, db_index=True)
+    platform = models.CharField(max_length=100, db_index=True)
     developer = models.CharField(max_length=255, blank=True)
     publisher = models.CharField(max_length=255, blank=True)
     release_date = models.CharField(max_length=50, blank=True)
     description = models.TextField(blank=True)
     url = models.URLField(blank=True)
+    # agregados de puntuación mantenidos por rate() y por las señales de borrado
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, db_index=True, editable=False)
+    # puntuación bayesiana del ranking global (0 sin votos), la mantiene leaderboards.py
+    bayes_score = models.FloatField(default=0, db_index=True, editable=False)
+    # sus votos han cambiado desde el último cálculo de juegos similares (similar.py)
+    similar_dirty = models.BooleanField(default=False, db_index=True, editable=False)
+    # copia local de la miniatura (thumbnails.py): hash del contenido y formatos guardados;
+    # thumb_status vacío = pendiente, 'ok' o 'failed' (se sigue usando la URL original)
+    thumb_digest = models.CharField(max_length=24, blank=True, editable=False)
+    thumb_formats = models.CharField(max_length=20, blank=True, editable=False)
+    thumb_status = models.CharField(max_length=10, blank=True, db_index=True, editable=False)
+    # marcador de cambios en los comentarios (altas, reacciones y borrados) para el polling;
+    # comments_purged_version es la última versión en la que se borró algo
+    comments_version = models.IntegerField(default=0, editable=False)
+    comments_purged_version = models.IntegerField(default=0, editable=False)
+    comments_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    comment_count = models.IntegerField(default=0, editable=False)
+    # última modificación de los datos o agregados que se exportan (gameJson, exportgames);
+    # version sube con cada cambio y sirve de clave de caché y ETag
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    version = models.IntegerField(default=1, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.normalized_title = normalizeTitle(self.title)
+        adding = self._state.adding
+        previous = None
+        if not adding:
+            stored = Game.objects.filter(pk=self.pk).values_list('genre', 'platform', 'thumbnail').first()
+            previous = stored[:2] if stored else None
+            # al editar sólo se escriben los datos del catálogo: los agregados y versiones
+            # los cambian los UPDATE con F() y la copia en memoria puede estar desfasada
+            catalog = self.catalogFields()
+            update_fields = kwargs.get('update_fields')
+            update_fields = catalog if update_fields is None else [
+                field for field in update_fields if field in catalog
+            ]
+            if stored and 'thumbnail' in update_fields and stored[2] != self.thumbnail:
+                # miniatura nueva: olvidamos la copia local para que se vuelva a descargar
+                self.thumb_digest = self.thumb_formats = self.thumb_status = ''
+                update_fields = update_fields + ['thumb_digest', 'thumb_formats', 'thumb_status']
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        if not adding:
+            # editado a mano (admin): invalidamos las copias en caché y recolocamos el
+            # juego por si ha cambiado de género o plataforma
+            Game.objects.filter(pk=self.pk).update(version=models.F('version') + 1)
+            self.refresh_from_db(fields=['version', 'comments_version'])
+            from .leaderboards import updateGameRanks
+            updateGameRanks(self.pk)
+            current = (self.genre, self.platform)
+            if previous is not None and previous != current:
+                from .facets import applyFacetDeltas
+                applyFacetDeltas({previous: -1, current: 1})
+
+    @classmethod
+    def catalogFields(cls):
+        # campos editables (admin, sincronización) más los que se derivan de ellos
+        return [
+            field.name for field in cls._meta.concrete_fields if field.editable and not field.primary_key
+        ] + ['normalized_title', 'updated_at']
+
+    def thumbnailSources(self):
+        # variantes locales de la miniatura, de la más ligera a la de reserva
+        if not self.thumb_digest:
+            return []
+        from .thumbnails import CONTENT_TYPES, variantName
+        return [
+            {'type': CONTENT_TYPES[extension],
+             'url': reverse('thumbnail', args=[variantName(self.thumb_digest, extension)])}
+            for extension in self.thumb_formats.split(',')
+        ]
+
+    def thumbnailUrl(self):
+        sources = self.thumbnailSources()
+        return sources[-1]['url'] if sources else self.thumbnail
+
     def averageRating(self):
-        return self.ratings.aggregate(models.Avg('score'))['score__avg'] or 0
+        return self.rating_avg
 
     def ratingCount(self):
-        return self.ratings.count()
+        return self.rating_count
+
+    def jsonData(self):
+        return {
+            "source_id": self.source_id,
+            "title": self.title,
+            "thumbnail": self.thumbnail,
+            "genre": self.genre,
+            "platform": self.platform,
+            "developer": self.developer,
+            "publisher": self.publisher,
+            "release_date": self.release_date,
+            "description": self.description,
+            "url": self.url,
+            "average_rating": self.rating_avg,
+            "rating_count": self.rating_count,
+            "bayesian_score": self.bayes_score,
+            "similar": [entry.similar.source_id for entry in self.similar_entries.all()],
+            "comment_count": self.comment_count,
+        }
+
+    @classmethod
+    def touchComments(cls, game_id, comments_delta=0, purged=False):
+        # sube la versión de comentarios del juego y devuelve la nueva (None si ya no existe)
+        now = timezone.now()
+        changes = {
+            'comments_version': models.F('comments_version') + 1,
+            'comments_updated_at': now,
+        }
+        if comments_delta:
+            changes['comment_count'] = models.F('comment_count') + comments_delta
+            changes['updated_at'] = now
+            changes['version'] = models.F('version') + 1
+        if purged:
+            changes['comments_purged_version'] = models.F('comments_version') + 1
+        games = cls.objects.filter(pk=game_id)
+        if not games.update(**changes):
+            return None
+        version = games.values_list('comments_version', flat=True).first()
+        # avisamos a las conexiones SSE cuando el cambio ya es visible
+        transaction.on_commit(lambda: broker.publish(game_id, version))
+        return version
+
+    @classmethod
+    def updateRatingStats(cls, game_id, sum_delta, count_delta):
+        # un único UPDATE atómico: la media se calcula con los valores nuevos de suma y cuenta
+        new_sum = models.F('rating_sum') + sum_delta
+        new_count = models.F('rating_count') + count_delta
+        cls.objects.filter(pk=game_id).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating_avg=averageExpression(new_sum, new_count),
+            updated_at=timezone.now(),
+            version=models.F('version') + 1,
+            similar_dirty=True,
+        )
+        from .leaderboards import updateGameRanks
+        updateGameRanks(game_id)
 
 
 # ------------------------------
@@ -34,6 +188,14 @@ class Comment(models.Model):
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='comments')
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # contadores de reacciones mantenidos por reactToComment y por las señales de borrado
+    likes_count = models.IntegerField(default=0, editable=False)
+    dislikes_count = models.IntegerField(default=0, editable=False)
+    # versión de comentarios del juego en la que cambió este comentario por última vez
+    version = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['game', 'version'])]
 
     def __str__(self):
         return f"{self.user.username} - {self.game.title}"
@@ -43,11 +205,31 @@ class Comment(models.Model):
     # como sus nombres indican, los dos metodos estos son para el tema de los likes en comentarios
     @property
     def likesCount(self):
-        return self.reactions.filter(is_like=True).count()
+        return self.likes_count
 
     @property
     def dislikesCount(self):
-        return self.reactions.filter(is_like=False).count()
+        return self.dislikes_count
+
+    @classmethod
+    def updateReactionCounts(cls, comment_id, previous, is_like, game_id=None):
+        # previous es la reacción anterior del usuario (None si no había); si cambia de
+        # like a dislike se resta de un contador y se suma al otro en el mismo UPDATE.
+        # Devuelve True si algo ha cambiado.
+        likes = int(is_like is True) - int(previous is True)
+        dislikes = int(is_like is False) - int(previous is False)
+        if not likes and not dislikes:
+            return False
+        if game_id is None:
+            game_id = cls.objects.filter(pk=comment_id).values_list('game_id', flat=True).first()
+            if game_id is None:
+                return False
+        cls.objects.filter(pk=comment_id).update(
+            likes_count=models.F('likes_count') + likes,
+            dislikes_count=models.F('dislikes_count') + dislikes,
+            version=Game.touchComments(game_id),
+        )
+        return True
 
 # ------------------------------
 #      PUNTUACIONES (0 a 5)
@@ -92,3 +274,169 @@ class CommentReaction(models.Model):
         return f"{self.user.username} reaccionó {'👍' if self.is_like else '👎'} a comentario {self.comment.id}"
 
 
+
+# ------------------------------
+#   ESTADO DE SINCRONIZACIÓN
+# ------------------------------
+class SyncState(models.Model):
+    source = models.CharField(max_length=50, unique=True)  # nombre del listado en CATALOG_SOURCES
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    last_sync = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, blank=True)  # ok, not_modified, error
+    last_error = models.TextField(blank=True)
+    created_count = models.IntegerField(default=0)
+    # circuit breaker: tras varios fallos seguidos dejamos de pedir el listado hasta open_until
+    consecutive_failures = models.IntegerField(default=0)
+    open_until = models.DateTimeField(null=True, blank=True)
+    # tiempos de la última ejecución en milisegundos
+    fetch_ms = models.FloatField(default=0)
+    parse_ms = models.FloatField(default=0)
+    insert_ms = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.source} ({self.last_status or 'nunca'})"
+
+    def isOpen(self, now):
+        return self.open_until is not None and self.open_until > now
+
+
+# ------------------------------
+#   ESTADÍSTICAS POR USUARIO
+# ------------------------------
+class UserStats(models.Model):
+    # una fila por usuario mantenida de forma incremental por las vistas (altas) y
+    # por las señales de borrado; rebuildstats la recalcula desde cero
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    votes = models.IntegerField(default=0)
+    score_sum = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    follows = models.IntegerField(default=0)
+    reactions = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Estadísticas de {self.user.username}"
+
+    def averageScore(self):
+        return self.score_sum / self.votes if self.votes else 0
+
+    @classmethod
+    def add(cls, user_id, rebuild_missing=True, **deltas):
+        updated = cls.objects.filter(pk=user_id).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()}
+        )
+        if not updated and rebuild_missing:
+            # usuario sin fila todavía: la calculamos entera (ya incluye este cambio)
+            from .stats import rebuildUserStats
+            rebuildUserStats(user_ids=[user_id])
+
+    @classmethod
+    def forUser(cls, user):
+        stats = cls.objects.filter(pk=user.pk).first()
+        if stats is None:
+            from .stats import rebuildUserStats
+            rebuildUserStats(user_ids=[user.pk])
+            stats = cls.objects.get(pk=user.pk)
+        return stats
+
+
+# ------------------------------
+#   CLASIFICACIONES
+# ------------------------------
+class Leaderboard(models.Model):
+    # una partición del ranking: global, por género o por plataforma
+    kind = models.CharField(max_length=10)  # global, genre, platform
+    value = models.CharField(max_length=100, blank=True)  # vacío en la global
+    # suma y número de votos de la partición, mantenidos con F() en cada voto: su media es
+    # el valor hacia el que se acercan los juegos con pocos votos
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('kind', 'value')
+
+    def __str__(self):
+        return f"{self.kind} {self.value}".strip()
+
+    def priorMean(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0.0
+
+
+class LeaderboardEntry(models.Model):
+    # puntuación de un juego con votos en una partición; la posición se calcula contando
+    # las entradas por delante sobre leaderboard_score_idx (leaderboards.rankOf)
+    kind = models.CharField(max_length=10)
+    value = models.CharField(max_length=100, blank=True)
+    # sin cascada: al borrar un juego la señal quita sus entradas
+    game = models.ForeignKey(Game, on_delete=models.DO_NOTHING, related_name='leaderboard_entries')
+    score = models.FloatField()
+    # votos del juego ya sumados a la partición: al cambiar se suma sólo la diferencia
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('kind', 'value', 'game')
+        indexes = [models.Index(fields=['kind', 'value', 'score', 'game'], name='leaderboard_score_idx')]
+
+    def __str__(self):
+        return f"{self.kind} {self.value}".strip() + f" ({self.score:.2f})"
+
+
+# ------------------------------
+#   JUEGOS SIMILARES
+# ------------------------------
+class SimilarGame(models.Model):
+    # vecinos precalculados por `manage.py similargames`; la web sólo los lee
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='similar_entries')
+    similar = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()  # coseno entre los jugadores a los que les gustó cada juego
+    rank = models.IntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('game', 'similar')
+        indexes = [models.Index(fields=['game', 'rank'], name='similar_game_rank_idx')]
+
+    def __str__(self):
+        return f"{self.game} -> {self.similar} ({self.score:.2f})"
+
+
+# ------------------------------
+#   CONTADORES DE FACETAS
+# ------------------------------
+class FacetCount(models.Model):
+    # juegos por par (género, plataforma); ver facets.py
+    genre = models.CharField(max_length=100)
+    platform = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('genre', 'platform')
+
+    def __str__(self):
+        return f"{self.genre} / {self.platform}: {self.count}"
+
+
+# ------------------------------
+#   PERFILES DE PETICIONES
+# ------------------------------
+class RequestProfile(models.Model):
+    # resultado del profiler por muestreo que lanza el staff con ?_profile=1 (ver profiling.py)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=100, blank=True)
+    status = models.IntegerField(default=0)
+    duration_ms = models.FloatField(default=0)
+    interval_ms = models.FloatField(default=0)
+    samples = models.IntegerField(default=0)
+    collapsed = models.TextField(blank=True)  # "marco;marco;marco muestras" por línea (flamegraph.pl, speedscope)
+    summary = models.TextField(blank=True)    # funciones con más muestras
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
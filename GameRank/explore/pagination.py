@@ -0,0 +1,89 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# ------------------------------
+#   PAGINACIÓN POR CURSOR
+# ------------------------------
+# En vez de COUNT + OFFSET seguimos desde la clave de ordenación del último elemento
+# visto, así la página 500 cuesta lo mismo que la primera. La ordenación tiene que
+# acabar en un campo único (normalmente el id) para que el cursor sea exacto.
+
+def encodeCursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decodeCursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    # sólo valores escalares: listas, objetos o null no pueden ser una clave de ordenación
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        return None
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, next_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        # (campo, descendente)
+        self.keys = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+    def afterFilter(self, values):
+        # (a < x) | (a == x & b < y) | ... para ordenación descendente
+        condition = Q()
+        for i, (field, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending else 'gt'
+            step = Q(**{f"{field}__{lookup}": values[i]})
+            for previous, value in zip(self.keys[:i], values):
+                step &= Q(**{previous[0]: value})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        values = decodeCursor(cursor, len(self.keys)) if cursor else None
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.afterFilter(values))
+            except (ValueError, TypeError, ValidationError):
+                # cursor bien formado pero con valores de otro tipo: primera página
+                queryset = self.queryset.order_by(*self.ordering)
+        # pedimos uno de más para saber si hay siguiente página sin hacer COUNT
+        items = list(queryset[:self.per_page + 1])
+        has_next = len(items) > self.per_page
+        items = items[:self.per_page]
+        next_cursor = None
+        if has_next:
+            next_cursor = encodeCursor([getattr(items[-1], field) for field, _ in self.keys])
+        return KeysetPage(items, has_next, next_cursor)
+
+
+def nextPageUrl(request, page):
+    # misma URL y parámetros (búsqueda, filtros...) cambiando sólo el cursor
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = page.next_cursor
+    return f"{request.path}?{params.urlencode()}"
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .models import RequestProfile
+
+# ------------------------------
+#   PROFILER POR MUESTREO
+# ------------------------------
+# Un usuario staff añade ?_profile=1 (o la cabecera X-Profile: 1) a cualquier URL y la
+# petición se ejecuta con un hilo que cada REQUEST_PROFILER_INTERVAL segundos copia la
+# pila del hilo que la atiende. Las pilas se guardan en RequestProfile en formato
+# "collapsed" (flamegraph.pl, speedscope) junto a un resumen de las funciones más vistas,
+# y se descargan desde el admin. Sin el parámetro el middleware no hace nada más.
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+SUMMARY_SIZE = 25
+
+
+def frameLabel(code):
+    filename = code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir) and 'site-packages' not in filename:
+        filename = os.path.relpath(filename, base_dir)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Sampler(threading.Thread):
+    def __init__(self, thread_id, interval, stop_code=None):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop_code = stop_code  # no subimos más allá del middleware
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.stop_code:
+                stack.append(frameLabel(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def summary(self):
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            # una función recursiva cuenta una sola vez por muestra
+            for label in set(stack):
+                total[label] += count
+        lines = [f"{self.samples} muestras cada {self.interval * 1000:g} ms", '',
+                 f"{'propio':>8} {'total':>8}  función"]
+        for label, count in total.most_common(SUMMARY_SIZE):
+            lines.append(f"{own[label]:>8} {count:>8}  {label}")
+        return '\n'.join(lines)
+
+
+def wantsProfile(request):
+    if PROFILE_PARAM not in request.GET and request.META.get(PROFILE_HEADER) != '1':
+        return False
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+class RequestProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not wantsProfile(request):
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        interval = getattr(settings, 'REQUEST_PROFILER_INTERVAL', 0.001)
+        sampler = Sampler(threading.get_ident(), interval, sys._getframe().f_code)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        match = getattr(request, 'resolver_match', None)
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=(match.view_name if match else '')[:100],
+            status=response.status_code,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            interval_ms=interval * 1000,
+            samples=sampler.samples,
+            collapsed=sampler.collapsed(),
+            summary=sampler.summary(),
+        )
+        keep = getattr(settings, 'REQUEST_PROFILES_KEEP', 200)
+        stale = RequestProfile.objects.order_by('-created_at', '-id').values_list('id', flat=True)[keep:]
+        RequestProfile.objects.filter(id__in=list(stale)).delete()
+        response['X-Profile-Id'] = str(profile.id)
+        return response
@@ -0,0 +1,94 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# ------------------------------
+#   BÚSQUEDA DE TEXTO (FTS5)
+# ------------------------------
+# Índice FTS5 de contenido externo sobre explore_game, mantenido por triggers de SQLite
+# (así cubre también bulk_create y los .update()). Lo crea installSearchIndex tras cada
+# migrate, porque SQLite pierde los triggers cuando Django reconstruye la tabla.
+
+FTS_TABLE = 'explore_game_fts'
+FTS_COLUMNS = ('title', 'description', 'genre', 'platform')
+# pesos de bm25 por columna: el título cuenta más que el resto
+FTS_WEIGHTS = (10.0, 1.0, 2.0, 2.0)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_available = {}
+
+def ftsAvailable(using='default'):
+    if using not in _available:
+        connection = connections[using]
+        _available[using] = connection.vendor == 'sqlite' and \
+            FTS_TABLE in connection.introspection.table_names(include_views=False)
+    return _available[using]
+
+def installSearchIndex(using='default', **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+    with connection.cursor() as cursor:
+        exists = FTS_TABLE in connection.introspection.table_names(cursor)
+        if not exists:
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, "
+                    f"content='explore_game', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            except Exception:
+                # SQLite compilado sin FTS5: la búsqueda usará icontains
+                return
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON explore_game BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON explore_game BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON explore_game BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        if not exists:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _available.pop(using, None)
+
+def rebuildSearchIndex(using='default'):
+    if ftsAvailable(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+def matchExpression(query):
+    # cada palabra como prefijo entre comillas: nada de sintaxis FTS del usuario
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def searchGames(games, query):
+    # devuelve el queryset filtrado y la ordenación a usar en la paginación
+    match = matchExpression(query)
+    if not match or not ftsAvailable(games.db):
+        return games.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(genre__icontains=query) |
+            Q(platform__icontains=query)
+        ), ('-bayes_score', '-id')
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    games = games.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    ).annotate(search_rank=RawSQL(
+        f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = explore_game.id", (match,),
+        output_field=FloatField()
+    ))
+    # bm25 es negativo: cuanto menor, más relevante
+    return games, ('search_rank', 'id')
@@ -0,0 +1,65 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import invalidateSiteCounters
+from .facets import applyFacetDeltas
+from .leaderboards import removeGame
+from .models import Comment, CommentReaction, FollowedGame, Game, Rating, UserStats
+
+# ------------------------------
+#   AGREGADOS AL BORRAR
+# ------------------------------
+# Las altas y cambios los mantienen las vistas; los borrados pueden venir de cualquier
+# sitio (admin, borrado de usuarios en cascada...) así que los recogemos aquí, igual que
+# las altas de comentarios, de las que depende el polling.
+
+@receiver(post_delete, sender=Rating)
+def ratingDeleted(sender, instance, **kwargs):
+    Game.updateRatingStats(instance.game_id, -instance.score, -1)
+    UserStats.add(instance.user_id, rebuild_missing=False, votes=-1, score_sum=-instance.score)
+
+@receiver(post_delete, sender=CommentReaction)
+def reactionDeleted(sender, instance, **kwargs):
+    Comment.updateReactionCounts(instance.comment_id, instance.is_like, None)
+    UserStats.add(instance.user_id, rebuild_missing=False, reactions=-1)
+
+@receiver(post_delete, sender=Comment)
+def commentDeleted(sender, instance, **kwargs):
+    # los clientes en modo "since" no pueden enterarse de un borrado: les pedimos recarga completa
+    Game.touchComments(instance.game_id, comments_delta=-1, purged=True)
+    UserStats.add(instance.user_id, rebuild_missing=False, comments=-1)
+
+@receiver(post_save, sender=Comment)
+def commentCreated(sender, instance, created, **kwargs):
+    # también los creados desde el admin o la shell: el polling y gameJson se enteran
+    if created:
+        instance.version = Game.touchComments(instance.game_id, comments_delta=1) or 0
+        Comment.objects.filter(pk=instance.pk).update(version=instance.version)
+
+@receiver(post_delete, sender=FollowedGame)
+def followDeleted(sender, instance, **kwargs):
+    UserStats.add(instance.user_id, rebuild_missing=False, follows=-1)
+
+@receiver(post_delete, sender=Game)
+def gameDeleted(sender, instance, **kwargs):
+    # las entradas de clasificación no van en cascada: las quitamos y restamos sus votos
+    removeGame(instance.pk)
+    applyFacetDeltas({(instance.genre, instance.platform): -1})
+
+@receiver(post_save, sender=Game)
+def gameCreated(sender, instance, created, **kwargs):
+    # las altas con bulk_create (sincronización) suman sus facetas en ingestGames
+    if created:
+        applyFacetDeltas({(instance.genre, instance.platform): 1})
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def gameCountChanged(sender, instance, created=True, **kwargs):
+    if created:
+        invalidateSiteCounters('total_games')
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def commentCountChanged(sender, instance, created=True, **kwargs):
+    if created:
+        invalidateSiteCounters('total_comments')
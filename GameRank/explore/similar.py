@@ -0,0 +1,168 @@
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Game, Rating, SimilarGame
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # opcionales: sin ellos se calcula en Python puro (catálogos pequeños)
+    np = sparse = None
+
+# ------------------------------
+#   JUEGOS SIMILARES
+# ------------------------------
+# "A quienes les gustó este juego también les gustó": similitud coseno entre juegos sobre
+# la matriz usuario × juego de "me gusta" (votos >= SIMILAR_GAMES_MIN_SCORE), es decir
+# jugadores en común / sqrt(jugadores de A · jugadores de B). Con NumPy/SciPy son productos
+# de matrices dispersas; se guardan los SIMILAR_GAMES_K vecinos de cada juego y las
+# vistas sólo leen esa tabla. En modo incremental se recalculan los juegos con
+# similar_dirty (sus votos han cambiado) y se corrigen las listas de los juegos que los
+# tenían como vecinos; `similargames --full` lo recalcula todo.
+
+WRITE_BATCH_SIZE = 500
+
+def similarSettings():
+    return (
+        getattr(settings, 'SIMILAR_GAMES_K', 10),
+        getattr(settings, 'SIMILAR_GAMES_MIN_SCORE', 4),
+        getattr(settings, 'SIMILAR_GAMES_MIN_COMMON', 2),
+    )
+
+def likedPairs(min_score):
+    return list(Rating.objects.filter(score__gte=min_score).values_list('user_id', 'game_id').iterator())
+
+def similarityRowsNumpy(pairs, targets, min_common):
+    # devuelve {juego: {otro: similitud}} de cada objetivo contra todo el catálogo
+    if not pairs:
+        return {}
+    users, user_index = np.unique(np.fromiter((u for u, _ in pairs), dtype=np.int64, count=len(pairs)), return_inverse=True)
+    games, game_index = np.unique(np.fromiter((g for _, g in pairs), dtype=np.int64, count=len(pairs)), return_inverse=True)
+    liked = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float64), (user_index, game_index)), shape=(len(users), len(games))
+    ).tocsc()
+    likes = np.asarray(liked.sum(axis=0)).ravel()
+    positions = {int(game_id): i for i, game_id in enumerate(games)}
+    columns = [positions[target] for target in targets if target in positions]
+    if not columns:
+        return {}
+    # jugadores en común de cada objetivo con cada juego: (objetivos × usuarios) · (usuarios × juegos)
+    common = (liked[:, columns].T @ liked).tocsr()
+    rows = {}
+    for row, column in enumerate(columns):
+        start, end = common.indptr[row], common.indptr[row + 1]
+        others, counts = common.indices[start:end], common.data[start:end]
+        keep = (counts >= min_common) & (others != column)
+        others, counts = others[keep], counts[keep]
+        scores = counts / np.sqrt(likes[column] * likes[others])
+        rows[int(games[column])] = {int(games[other]): float(score) for other, score in zip(others, scores)}
+    return rows
+
+def similarityRowsPython(pairs, targets, min_common):
+    likers = defaultdict(set)
+    liked_by = defaultdict(set)
+    for user_id, game_id in pairs:
+        likers[game_id].add(user_id)
+        liked_by[user_id].add(game_id)
+    rows = {}
+    for target in targets:
+        if target not in likers:
+            continue
+        common = defaultdict(int)
+        for user_id in likers[target]:
+            for other in liked_by[user_id]:
+                common[other] += 1
+        rows[target] = {
+            other: count / math.sqrt(len(likers[target]) * len(likers[other]))
+            for other, count in common.items() if other != target and count >= min_common
+        }
+    return rows
+
+def similarityRows(pairs, targets, min_common):
+    if np is not None:
+        return similarityRowsNumpy(pairs, targets, min_common)
+    return similarityRowsPython(pairs, targets, min_common)
+
+def topNeighbors(row, k):
+    # mayor similitud primero; a igualdad, el id menor
+    return heapq.nsmallest(k, row.items(), key=lambda item: (-item[1], item[0]))
+
+def chunked(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), WRITE_BATCH_SIZE):
+        yield ids[i:i + WRITE_BATCH_SIZE]
+
+def storedNeighbors(game_ids):
+    stored = defaultdict(list)
+    for chunk in chunked(game_ids):
+        for game_id, other, score in SimilarGame.objects.filter(game_id__in=chunk).order_by('game_id', 'rank').values_list(
+            'game_id', 'similar_id', 'score'
+        ):
+            stored[game_id].append((other, score))
+    return stored
+
+def writeNeighbors(neighbors):
+    # neighbors: {juego: [(vecino, similitud), ...]} ya ordenado y recortado
+    for chunk in chunked(neighbors):
+        SimilarGame.objects.filter(game_id__in=chunk).delete()
+    SimilarGame.objects.bulk_create([
+        SimilarGame(game_id=game_id, similar_id=other, score=score, rank=rank)
+        for game_id, row in neighbors.items()
+        for rank, (other, score) in enumerate(row, 1)
+    ], batch_size=WRITE_BATCH_SIZE)
+    # gameJson y la exportación incluyen los vecinos: nueva versión de cada juego tocado
+    now = timezone.now()
+    for chunk in chunked(neighbors):
+        Game.objects.filter(id__in=chunk).update(version=F('version') + 1, updated_at=now)
+
+def sameNeighbors(old, new):
+    return [other for other, _ in old] == [other for other, _ in new] and \
+        all(math.isclose(a, b) for (_, a), (_, b) in zip(old, new))
+
+def computeSimilarGames(full=False):
+    k, min_score, min_common = similarSettings()
+    full = full or not SimilarGame.objects.exists()
+    games = Game.objects.all() if full else Game.objects.filter(similar_dirty=True)
+    targets = list(games.values_list('id', flat=True))
+    if not targets:
+        return 0
+    # bajamos la marca antes de leer los votos: lo que se vote mientras calculamos queda
+    # marcado para la siguiente ejecución
+    for chunk in chunked(targets):
+        Game.objects.filter(id__in=chunk).update(similar_dirty=False)
+    rows = similarityRows(likedPairs(min_score), targets, min_common)
+    neighbors = {target: topNeighbors(rows.get(target, {}), k) for target in targets}
+
+    if not full:
+        # la similitud es simétrica: los demás juegos ven cambiar su valor con los objetivos.
+        # Partimos de su lista guardada sin los objetivos y añadimos los valores nuevos
+        target_set = set(targets)
+        affected = defaultdict(dict)
+        for target, row in rows.items():
+            for other, score in row.items():
+                if other not in target_set:
+                    affected[other][target] = score
+        for chunk in chunked(targets):
+            for game_id in SimilarGame.objects.filter(similar_id__in=chunk).values_list('game_id', flat=True):
+                if game_id not in target_set:
+                    affected.setdefault(game_id, {})
+        for game_id, row in storedNeighbors(affected).items():
+            affected[game_id].update((other, score) for other, score in row if other not in target_set)
+        for game_id, row in affected.items():
+            neighbors[game_id] = topNeighbors(row, k)
+
+    # sólo reescribimos (y subimos de versión) los juegos cuya lista cambia
+    stored = storedNeighbors(neighbors)
+    changed = {game_id: row for game_id, row in neighbors.items() if not sameNeighbors(stored.get(game_id, []), row)}
+    with transaction.atomic():
+        writeNeighbors(changed)
+    return len(changed)
+
+def similarGames(game):
+    return [entry.similar for entry in game.similar_entries.select_related('similar')]
@@ -0,0 +1,59 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+
+from .models import Comment, CommentReaction, FollowedGame, Game, Rating, UserStats, averageExpression
+
+# ------------------------------
+#   RECONSTRUCCIÓN DE AGREGADOS
+# ------------------------------
+# Recalculan desde cero los contadores que las vistas mantienen de forma incremental.
+
+def groupedSubquery(queryset, field, aggregate):
+    subquery = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(subquery.annotate(value=aggregate).values('value'), output_field=IntegerField()), Value(0))
+
+def rebuildGameRatings():
+    rating_sum = groupedSubquery(Rating.objects, 'game', Sum('score'))
+    rating_count = groupedSubquery(Rating.objects, 'game', Count('id'))
+    # sólo los juegos cuyos agregados cambian, y subiendo su versión: gameJson, las
+    # tarjetas en caché y la exportación incremental dependen de ella
+    Game.objects.alias(new_sum=rating_sum, new_count=rating_count).exclude(
+        rating_sum=F('new_sum'), rating_count=F('new_count')
+    ).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating_avg=averageExpression(rating_sum, rating_count),
+        similar_dirty=True,
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    )
+
+def rebuildGameComments():
+    comment_count = groupedSubquery(Comment.objects, 'game', Count('id'))
+    Game.objects.alias(new_count=comment_count).exclude(comment_count=F('new_count')).update(
+        comment_count=comment_count, version=F('version') + 1, updated_at=timezone.now(),
+    )
+
+def rebuildCommentReactions():
+    Comment.objects.update(
+        likes_count=groupedSubquery(CommentReaction.objects.filter(is_like=True), 'comment', Count('id')),
+        dislikes_count=groupedSubquery(CommentReaction.objects.filter(is_like=False), 'comment', Count('id')),
+    )
+
+def rebuildUserStats(user_ids=None):
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in users.filter(stats__isnull=True).values_list('pk', flat=True)],
+        batch_size=500, ignore_conflicts=True,
+    )
+    rows = UserStats.objects.all() if user_ids is None else UserStats.objects.filter(pk__in=user_ids)
+    rows.update(
+        votes=groupedSubquery(Rating.objects, 'user', Count('id')),
+        score_sum=groupedSubquery(Rating.objects, 'user', Sum('score')),
+        comments=groupedSubquery(Comment.objects, 'user', Count('id')),
+        follows=groupedSubquery(FollowedGame.objects, 'user', Count('id')),
+        reactions=groupedSubquery(CommentReaction.objects, 'user', Count('id')),
+    )
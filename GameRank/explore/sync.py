@@ -0,0 +1,278 @@
+import codecs
+import json
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .counters import invalidateSiteCounters
+from .facets import applyFacetDeltas, countNewGames
+from .models import Game, SyncState, normalizeTitle
+
+LOOKUP_BATCH_SIZE = 500
+INSERT_BATCH_SIZE = 500
+INGEST_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+MAX_BREAKER_COOLDOWN = 6 * 3600
+
+# ------------------------------
+#   MOTOR DE SINCRONIZACIÓN
+# ------------------------------
+# Los listados se configuran en settings.CATALOG_SOURCES; cada uno es un dict con
+# name, url, format ('xml' o 'json') y prefix, y opcionalmente timeout (segundos para
+# conectar y por operación de socket) y read_timeout (segundos totales de descarga).
+# La url puede ser http(s):// o file:// para apuntar a ficheros locales en tests y staging.
+
+def getSources(names=None):
+    sources = settings.CATALOG_SOURCES
+    if names:
+        sources = [source for source in sources if source['name'] in names]
+    return sources
+
+def buildGame(game, prefix):
+    # crea la instancia sin guardarla; bulk_create no llama a save() así que
+    # rellenamos aquí normalized_title
+    title = game['title']
+    return Game(
+        source_id = f"{prefix}{game['id']}",
+        title = title,
+        normalized_title = normalizeTitle(title),
+        description = game.get('short_description') or '',
+        platform = game.get('platform') or '',
+        genre = game.get('genre') or '',
+        thumbnail = game.get('thumbnail') or '',
+        url = game.get('game_url') or '',
+        developer = game.get('developer') or '',
+        publisher = game.get('publisher') or '',
+        release_date = game.get('release_date') or ''
+    )
+
+def ingestGames(games, prefix, timings=None):
+    # deduplicado por conjuntos: una consulta indexada por lote en vez de comparar
+    # cada juego contra todo el catálogo
+    started = time.perf_counter()
+    candidates = {}
+    for entry in games:
+        game = buildGame(entry, prefix)
+        if game.normalized_title not in candidates:
+            candidates[game.normalized_title] = game
+    if timings is not None:
+        timings['parse_ms'] += elapsedMs(started)
+        started = time.perf_counter()
+    if not candidates:
+        return 0
+
+    existing_titles = set()
+    existing_ids = set()
+    keys = list(candidates)
+    for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        chunk = keys[i:i + LOOKUP_BATCH_SIZE]
+        source_ids = [candidates[key].source_id for key in chunk]
+        for title, source_id in Game.objects.filter(
+            Q(normalized_title__in=chunk) | Q(source_id__in=source_ids)
+        ).values_list('normalized_title', 'source_id'):
+            existing_titles.add(title)
+            existing_ids.add(source_id)
+
+    new_games = [
+        game for key, game in candidates.items()
+        if key not in existing_titles and game.source_id not in existing_ids
+    ]
+    with transaction.atomic():
+        Game.objects.bulk_create(new_games, batch_size=INSERT_BATCH_SIZE)
+        applyFacetDeltas(countNewGames(new_games))
+    if timings is not None:
+        timings['insert_ms'] += elapsedMs(started)
+    return len(new_games)
+
+def readBody(response, source, started):
+    # volcamos la respuesta por trozos a un fichero temporal (en memoria sólo hasta
+    # SPOOL_MAX_SIZE) y cortamos la descarga si supera read_timeout en total
+    read_timeout = source.get('read_timeout', DEFAULT_READ_TIMEOUT)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        while True:
+            chunk = response.read(READ_CHUNK_SIZE)
+            if not chunk:
+                spool.seek(0)
+                return spool
+            spool.write(chunk)
+            if time.monotonic() - started > read_timeout:
+                raise TimeoutError(f"lectura de {source['name']} supera {read_timeout}s")
+    except BaseException:
+        spool.close()
+        raise
+
+def iterXmlGames(fp):
+    # parseo incremental de los <game>; limpiamos la raíz tras cada uno para que
+    # el árbol no crezca con el listado
+    events = ET.iterparse(fp, events=('start', 'end'))
+    _, root = next(events)
+    for event, elem in events:
+        if event == 'end' and elem.tag == 'game':
+            yield {child.tag: child.text or '' for child in elem}
+            root.clear()
+
+def iterJsonArray(fp, chunk_size=READ_CHUNK_SIZE):
+    # decodifica un array JSON elemento a elemento sin cargarlo entero en memoria
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer, pos, opened, eof = '', 0, False, False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (opened and buffer[pos] == ',')):
+            pos += 1
+        if pos < len(buffer):
+            if not opened:
+                if buffer[pos] != '[':
+                    raise ValueError("se esperaba un array JSON")
+                opened = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # si el valor llega justo al final del buffer puede estar cortado
+                if end < len(buffer) or eof:
+                    yield item
+                    pos = end
+                    continue
+        elif eof:
+            raise ValueError("array JSON incompleto")
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+def fetchSource(source, state, force=False):
+    # petición condicional: si el listado no ha cambiado desde la última vez devolvemos None.
+    # Se ejecuta en un hilo del pool, así que no toca la base de datos.
+    started = time.monotonic()
+    request = urllib.request.Request(source['url'])
+    if not force:
+        if state.etag:
+            request.add_header('If-None-Match', state.etag)
+        if state.last_modified:
+            request.add_header('If-Modified-Since', state.last_modified)
+    timeout = source.get('timeout', DEFAULT_CONNECT_TIMEOUT)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            etag = response.headers.get('ETag', '')
+            last_modified = response.headers.get('Last-Modified', '')
+            # hay servidores (y file://) que ignoran las cabeceras condicionales
+            if not force and (etag or last_modified) and \
+                    etag == state.etag and last_modified == state.last_modified:
+                return None
+            return readBody(response, source, started), etag, last_modified
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+
+def timedFetch(source, state, force):
+    started = time.perf_counter()
+    try:
+        return fetchSource(source, state, force), None, elapsedMs(started)
+    except Exception as e:
+        return None, e, elapsedMs(started)
+
+def elapsedMs(started):
+    return (time.perf_counter() - started) * 1000
+
+def ingestSource(source, fp, timings):
+    # los juegos van entrando en lotes de INGEST_BATCH_SIZE según se parsean, así que
+    # la memoria no depende del tamaño del listado; todo el listado va en una transacción
+    if source['format'] == 'xml':
+        entries = iterXmlGames(fp)
+    else:
+        entries = iterJsonArray(fp)
+    created = 0
+    with transaction.atomic():
+        while True:
+            started = time.perf_counter()
+            batch = list(islice(entries, INGEST_BATCH_SIZE))
+            timings['parse_ms'] += elapsedMs(started)
+            if not batch:
+                break
+            created += ingestGames(batch, source['prefix'], timings)
+        # bulk_create no lanza señales
+        if created:
+            invalidateSiteCounters('total_games')
+    return created
+
+def recordFailure(state, error, now):
+    state.last_status = 'error'
+    state.last_error = str(error) or error.__class__.__name__
+    state.created_count = 0
+    state.consecutive_failures += 1
+    threshold = getattr(settings, 'CATALOG_BREAKER_THRESHOLD', 3)
+    if state.consecutive_failures >= threshold:
+        # backoff exponencial mientras el listado siga fallando
+        cooldown = getattr(settings, 'CATALOG_BREAKER_COOLDOWN', 300)
+        cooldown = min(cooldown * 2 ** (state.consecutive_failures - threshold), MAX_BREAKER_COOLDOWN)
+        state.open_until = now + timedelta(seconds=cooldown)
+
+def finishSource(source, state, fetched, error, fetch_ms):
+    timings = {'parse_ms': 0.0, 'insert_ms': 0.0}
+    now = timezone.now()
+    try:
+        if error is not None:
+            raise error
+        if fetched is None:
+            state.last_status = 'not_modified'
+            state.created_count = 0
+        else:
+            body, etag, last_modified = fetched
+            with body:
+                state.created_count = ingestSource(source, body, timings)
+            # sólo guardamos los validadores si la importación ha ido bien
+            state.etag = etag
+            state.last_modified = last_modified
+            state.last_status = 'ok'
+        state.last_error = ''
+        state.consecutive_failures = 0
+        state.open_until = None
+    except Exception as e:
+        recordFailure(state, e, now)
+    state.fetch_ms = fetch_ms
+    state.parse_ms = timings['parse_ms']
+    state.insert_ms = timings['insert_ms']
+    state.last_sync = now
+    state.save()
+
+def syncGames(names=None, force=False):
+    # las descargas van en paralelo en un pool de hilos, así el tiempo total lo marca el
+    # listado más lento; la importación se hace en este hilo y en el orden configurado
+    # para que el deduplicado dé siempre prioridad a los primeros listados
+    sources = getSources(names)
+    states = {source['name']: SyncState.objects.get_or_create(source=source['name'])[0] for source in sources}
+    now = timezone.now()
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(sources))) as pool:
+        for source in sources:
+            state = states[source['name']]
+            if state.isOpen(now) and not force:
+                state.last_status = 'skipped'
+                state.created_count = 0
+                state.save(update_fields=['last_status', 'created_count'])
+                continue
+            pending[pool.submit(timedFetch, source, state, force)] = source
+        for future, source in pending.items():
+            finishSource(source, states[source['name']], *future.result())
+    return [states[source['name']] for source in sources]
@@ -1,9 +1,117 @@
-from django.test import TestCase, Client
+import asyncio
+import gzip
+import io
+import json
+import math
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock, skipUnless
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import CommandError, call_command
+from django.db import connection, OperationalError
+from django.db.utils import ConnectionHandler
 from django.urls import reverse
+from django.template import engines
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.contrib.auth.models import User
-from explore.models import Game, Rating, FollowedGame, Comment, CommentReaction
+from explore.models import (
+    Game, Rating, FollowedGame, Comment, CommentReaction, SyncState, UserStats, RequestProfile, Leaderboard,
+    LeaderboardEntry, FacetCount, SimilarGame,
+)
+from explore import live, search, similar
+from GameRank import staticfiles as staticpipeline
+from GameRank.instrumentation import RequestMetrics
+from explore.benchmark import benchmarkReport, compareReports, runBenchmark, seedData
+from explore.counters import siteCounter
+from explore.facets import rebuildFacetCounts
+from explore.similar import computeSimilarGames, likedPairs
+from explore.leaderboards import bayesScore, gameRanks, rankOf, rebuildLeaderboards, topGames
+from explore.profiling import Sampler
+from explore.pagination import encodeCursor
+from explore.sync import syncGames, ingestGames, iterJsonArray, iterXmlGames
+from explore import thumbnails
+from explore.thumbnails import cacheThumbnails, sniffFormat
 from django.utils import timezone
 
+LISTADO1 = Path(settings.BASE_DIR).parent / 'listado1.xml'
+
+
+# origen local de miniaturas (THUMBNAIL_FETCHER) en lugar de descargarlas de internet
+THUMBNAIL_IMAGES = {}
+THUMBNAIL_FETCHES = []
+
+def localThumbnailFetcher(url, timeout):
+    THUMBNAIL_FETCHES.append(url)
+    if url not in THUMBNAIL_IMAGES:
+        raise OSError(f"no encontrada: {url}")
+    return THUMBNAIL_IMAGES[url]
+
+def sampleImage(width, height):
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(output, 'PNG')
+    return output.getvalue()
+
+
+class FeedServer:
+    # servidor HTTP local que sustituye a los listados reales: path -> (body, delay, etag);
+    # delay puede ser un threading.Barrier para exigir que varias descargas coincidan
+    def __init__(self, feeds):
+        self.feeds = feeds
+        feeds_ref = feeds
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in feeds_ref:
+                    self.send_error(404)
+                    return
+                body, delay, etag = feeds_ref[self.path]
+                if isinstance(delay, threading.Barrier):
+                    try:
+                        delay.wait()
+                    except threading.BrokenBarrierError:
+                        self.send_error(503)  # la otra descarga no llegó a tiempo: no eran concurrentes
+                        return
+                else:
+                    time.sleep(delay)
+                try:
+                    self.respond(body, etag)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # el cliente ya ha cortado por timeout
+
+            def respond(self, body, etag):
+                if etag and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 class GameViewsTestCase(TestCase):
     def setUp(self):
         self.client = Client()
@@ -66,3 +174,1309 @@ class GameViewsTestCase(TestCase):
         response = self.client.post(reverse('react_comment', args=[comment.id]), {'reaction': 'like'})
         self.assertRedirects(response, reverse('explore'))
         self.assertTrue(CommentReaction.objects.filter(user=self.user, comment=comment, is_like=True).exists())
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        Game.objects.bulk_create([
+            Game(source_id=f'K-{i}', title=f'Juego {i}', thumbnail='http://example.com/t.jpg', bayes_score=i % 5)
+            for i in range(50)
+        ])
+
+    def test_scroll_through_all_pages(self):
+        seen = []
+        query_counts = set()
+        url = reverse('explore')
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_HX_REQUEST='true')
+            self.assertFalse(any('OFFSET' in q['sql'] for q in queries))
+            query_counts.add(len(queries))
+            page = response.context['page_obj']
+            seen.extend((game.bayes_score, game.id) for game in page)
+            url = response.context['next_url']
+        self.assertEqual(len(seen), 50)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        # todas las páginas cuestan las mismas consultas
+        self.assertEqual(len(query_counts), 1)
+
+    def test_cursor_keeps_search_query(self):
+        response = self.client.get(reverse('explore') + '?q=Juego')
+        self.assertIn('q=Juego', response.context['next_url'])
+        self.assertIn('cursor=', response.context['next_url'])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('explore') + '?cursor=basura!!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 21)
+
+    def test_cursor_with_wrong_value_types_falls_back_to_first_page(self):
+        first = [game.id for game in self.client.get(reverse('explore')).context['page_obj']]
+        for values in (['x', 1], [None, 1], [[1], 1], [True, 1]):
+            cursor = encodeCursor(values)
+            for url in (reverse('explore'), reverse('explore') + '?q=Juego'):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+            response = self.client.get(reverse('explore'), {'cursor': cursor})
+            self.assertEqual([game.id for game in response.context['page_obj']], first)
+        self.client.force_login(User.objects.create_user(username='cursor'))
+        response = self.client.get(reverse('user_games', args=['voted']), {'cursor': encodeCursor(['x', 1])})
+        self.assertEqual(response.status_code, 200)
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        Game.objects.bulk_create([
+            Game(source_id='S-1', title='Pokémon Arena', description='Batallas', genre='Card Game', platform='PC', thumbnail='http://example.com/t.jpg'),
+            Game(source_id='S-2', title='Dragones', description='Un MMORPG con pokemon escondidos', genre='MMORPG', platform='PC', thumbnail='http://example.com/t.jpg'),
+            Game(source_id='S-3', title='Warframe', description='Shooter cooperativo', genre='Shooter', platform='PC', thumbnail='http://example.com/t.jpg'),
+        ])
+
+    def search(self, query):
+        response = self.client.get(reverse('explore'), {'q': query})
+        return [game.source_id for game in response.context['page_obj']]
+
+    def test_accent_folding_and_relevance(self):
+        self.assertTrue(search.ftsAvailable())
+        # el juego con la palabra en el título va primero
+        self.assertEqual(self.search('POKEMON'), ['S-1', 'S-2'])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.search('warf'), ['S-3'])
+        self.assertEqual(self.search('shoot coop'), ['S-3'])
+
+    def test_index_follows_updates_and_deletes(self):
+        Game.objects.filter(source_id='S-3').update(title='Destiny')
+        self.assertEqual(self.search('warframe'), [])
+        self.assertEqual(self.search('destiny'), ['S-3'])
+        Game.objects.filter(source_id='S-3').delete()
+        self.assertEqual(self.search('destiny'), [])
+
+    def test_search_results_paginate_by_relevance(self):
+        Game.objects.bulk_create([
+            Game(source_id=f'SP-{i}', title=f'Saga {i}', description='saga ' * (i % 4), thumbnail='http://example.com/t.jpg')
+            for i in range(30)
+        ])
+        response = self.client.get(reverse('explore'), {'q': 'saga'}, HTTP_HX_REQUEST='true')
+        first = [game.source_id for game in response.context['page_obj']]
+        response = self.client.get(response.context['next_url'], HTTP_HX_REQUEST='true')
+        second = [game.source_id for game in response.context['page_obj']]
+        self.assertEqual(len(set(first + second)), 30)
+        self.assertIsNone(response.context['next_url'])
+
+    def test_fallback_without_fts(self):
+        with mock.patch('explore.search.ftsAvailable', return_value=False):
+            self.assertEqual(self.search('Warframe'), ['S-3'])
+
+
+class RatingAggregatesTestCase(TestCase):
+    def setUp(self):
+        self.alex = User.objects.create_user(username='alex', password='testpass')
+        self.bea = User.objects.create_user(username='bea', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+
+    def rate(self, username, score):
+        self.client.login(username=username, password='testpass')
+        self.client.post(reverse('rate', args=[self.game.source_id]), {'score': score})
+        self.game.refresh_from_db()
+
+    def test_rate_and_rerate(self):
+        self.rate('alex', '4')
+        self.rate('bea', '1')
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating_avg), (5, 2, 2.5))
+        self.rate('alex', '2')
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating_avg), (3, 2, 1.5))
+
+    def test_deletes_keep_aggregates(self):
+        self.rate('alex', '4')
+        self.rate('bea', '1')
+        Rating.objects.filter(user=self.bea).delete()
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.rating_count, self.game.rating_avg), (1, 4.0))
+        self.alex.delete()
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating_avg), (0, 0, 0.0))
+
+    def test_stale_edit_keeps_aggregates(self):
+        stale = Game.objects.get(pk=self.game.pk)
+        self.rate('alex', '4')
+        stale.title = 'Hearthstone 2'
+        stale.save()
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.title, 'Hearthstone 2')
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating_avg), (4, 1, 4.0))
+        self.assertGreater(self.game.bayes_score, 0)
+
+    def test_admin_edit_keeps_aggregates(self):
+        self.rate('alex', '4')
+        self.rate('bea', '2')
+        admin = User.objects.create_superuser(username='admin', password=None)
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:explore_game_change', args=[self.game.pk]), {
+            'source_id': 'LIS1-1', 'title': 'Hearthstone editado', 'thumbnail': 'http://example.com/img.png',
+            'genre': 'Card Game', 'platform': 'PC', 'developer': '', 'publisher': '', 'release_date': '',
+            'description': '', 'url': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.title, self.game.genre), ('Hearthstone editado', 'Card Game'))
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating_avg), (6, 2, 3.0))
+        self.assertTrue(self.game.leaderboard_entries.filter(kind='genre', value='Card Game').exists())
+
+    def test_rebuild_command(self):
+        other = Game.objects.create(source_id='LIS1-2', title='Otro', thumbnail='http://example.com/img.png')
+        Rating.objects.create(user=self.alex, game=self.game, score=5)
+        Rating.objects.create(user=self.bea, game=self.game, score=2)
+        Comment.objects.bulk_create([Comment(user=self.alex, game=self.game, text='Sin señales')])
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('game_json', args=['LIS1-1'])).json()['comment_count'], 0)
+        version, other_version = self.game.version, other.version
+        call_command('rebuildstats', stdout=io.StringIO())
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.rating_sum, self.game.rating_count, self.game.rating_avg), (7, 2, 3.5))
+        # los juegos corregidos cambian de versión (y de JSON); los demás no
+        self.assertGreater(self.game.version, version)
+        self.assertEqual(Game.objects.get(pk=other.pk).version, other_version)
+        data = self.client.get(reverse('game_json', args=['LIS1-1'])).json()
+        self.assertEqual((data['comment_count'], data['rating_count']), (1, 2))
+
+
+class LeaderboardTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # sin contraseña: los tests entran con force_login y nos ahorramos el hash
+        cls.users = [User.objects.create_user(username=f'u{i}') for i in range(12)]
+        specs = [('LB-A', 'Shooter', 'PC'), ('LB-B', 'Shooter', 'Web'), ('LB-C', 'MMORPG', 'PC'),
+                 ('LB-D', 'Shooter', 'PC'), ('LB-E', 'MMORPG', 'Web')]
+        cls.games = {
+            source_id: Game.objects.create(source_id=source_id, title=source_id, genre=genre, platform=platform,
+                                           thumbnail='http://example.com/t.jpg')
+            for source_id, genre, platform in specs
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def rate(self, user, source_id, score):
+        self.client.force_login(user)
+        self.client.post(reverse('rate', args=[source_id]), {'score': score})
+
+    def assertConsistent(self, exact=False):
+        # posiciones consecutivas por puntuación y votos de cada partición iguales a la suma de
+        # los de sus juegos; tras rebuildLeaderboards (exact) cada puntuación usa la media actual
+        boards = {(board.kind, board.value): board for board in Leaderboard.objects.all()}
+        partitions = set(LeaderboardEntry.objects.values_list('kind', 'value'))
+        for kind, value in partitions:
+            entries = list(LeaderboardEntry.objects.filter(kind=kind, value=value).select_related('game')
+                           .order_by('-score', 'game_id'))
+            self.assertEqual([rankOf(kind, value, entry.score, entry.game_id) for entry in entries],
+                             list(range(1, len(entries) + 1)))
+            board = boards[(kind, value)]
+            self.assertEqual((board.rating_sum, board.rating_count),
+                             (sum(entry.game.rating_sum for entry in entries), sum(entry.game.rating_count for entry in entries)))
+            for entry in entries:
+                self.assertEqual((entry.rating_sum, entry.rating_count), (entry.game.rating_sum, entry.game.rating_count))
+                if kind == 'global':
+                    self.assertAlmostEqual(entry.game.bayes_score, entry.score)
+                if exact:
+                    expected = bayesScore(entry.game.rating_sum, entry.game.rating_count,
+                                          board.priorMean(), settings.LEADERBOARD_PRIOR_VOTES)
+                    self.assertAlmostEqual(entry.score, expected)
+
+    def test_prior_is_the_partition_mean_without_rebuild(self):
+        # instalación nueva, sin rebuildstats: 40 votos de media 3 frente a tres de 5
+        Game.updateRatingStats(self.games['LB-A'].pk, 120, 40)
+        Game.updateRatingStats(self.games['LB-B'].pk, 15, 3)
+        prior = 135 / 43
+        self.assertAlmostEqual(Leaderboard.objects.get(kind='global').priorMean(), prior)
+        self.assertAlmostEqual(Game.objects.get(source_id='LB-B').bayes_score, (5 * prior + 15) / 8)
+        # con la media de la partición de antes de su voto (sólo LB-A)
+        self.assertAlmostEqual(Game.objects.get(source_id='LB-A').bayes_score, (5 * 3 + 120) / 45)
+        rebuildLeaderboards()
+        self.assertAlmostEqual(Game.objects.get(source_id='LB-A').bayes_score, (5 * prior + 120) / 45)
+        self.assertConsistent(exact=True)
+
+    def test_single_vote_does_not_outrank_well_reviewed_games(self):
+        for user in self.users[:10]:
+            self.rate(user, 'LB-A', 4)
+        self.rate(self.users[0], 'LB-B', 5)
+        for user in self.users[:3]:
+            self.rate(user, 'LB-C', 2)
+            self.rate(user, 'LB-E', 1)
+        rebuildLeaderboards()
+        self.assertEqual([game.source_id for game in topGames(limit=2)], ['LB-A', 'LB-B'])
+        self.assertEqual(list(topGames('platform', 'PC', 1)), [self.games['LB-A']])
+        # el explorador ordena por la misma puntuación
+        response = self.client.get(reverse('explore'))
+        self.assertEqual([game.source_id for game in response.context['page_obj']][:2], ['LB-A', 'LB-B'])
+
+    def test_incremental_updates_keep_ranks_consistent(self):
+        moves = [(0, 'LB-A', 3), (1, 'LB-B', 5), (2, 'LB-C', 1), (3, 'LB-D', 4), (4, 'LB-E', 2),
+                 (5, 'LB-A', 5), (0, 'LB-A', 0), (6, 'LB-C', 5), (1, 'LB-B', 1), (7, 'LB-D', 4),
+                 (8, 'LB-E', 5), (2, 'LB-C', 4), (9, 'LB-B', 3), (3, 'LB-D', 0)]
+        for user, source_id, score in moves:
+            self.rate(self.users[user], source_id, score)
+            self.assertConsistent()
+        self.assertEqual(LeaderboardEntry.objects.filter(kind='global').count(), 5)
+        Rating.objects.filter(game=self.games['LB-C']).delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(game=self.games['LB-C']).exists())
+        self.assertEqual(Game.objects.get(source_id='LB-C').bayes_score, 0)
+        self.assertConsistent()
+
+    def test_rebuild_matches_incremental_order(self):
+        for i, (source_id, score) in enumerate([('LB-A', 5), ('LB-B', 2), ('LB-C', 4), ('LB-D', 3)]):
+            self.rate(self.users[i], source_id, score)
+        before = list(LeaderboardEntry.objects.order_by('kind', 'value', '-score', 'game_id').values_list('kind', 'value', 'game_id'))
+        rebuildLeaderboards()
+        after = list(LeaderboardEntry.objects.order_by('kind', 'value', '-score', 'game_id').values_list('kind', 'value', 'game_id'))
+        # sin votos nuevos las puntuaciones no cambian: nadie sube de versión
+        versions = dict(Game.objects.values_list('id', 'version'))
+        rebuildLeaderboards()
+        self.assertEqual(dict(Game.objects.values_list('id', 'version')), versions)
+        self.assertEqual(before, after)
+        self.assertConsistent(exact=True)
+
+    def test_passing_a_game_only_writes_the_voted_game(self):
+        self.rate(self.users[0], 'LB-A', 3)
+        self.rate(self.users[1], 'LB-B', 2)
+        version = Game.objects.get(source_id='LB-A').version
+        self.rate(self.users[2], 'LB-B', 5)
+        self.rate(self.users[3], 'LB-B', 5)
+        # LB-A baja un puesto sin que se toque su fila ni su versión (cachés intactas)
+        self.assertEqual(Game.objects.get(source_id='LB-A').version, version)
+        ranks = gameRanks(Game.objects.get(source_id='LB-A'))
+        self.assertEqual({kind: rank['rank'] for kind, rank in ranks.items()}, {'global': 2, 'genre': 2, 'platform': 1})
+        self.assertNotIn('ranks', json.loads(self.client.get(reverse('game_json', args=['LB-A'])).content))
+
+    def test_details_and_deletion(self):
+        self.rate(self.users[0], 'LB-A', 5)
+        self.rate(self.users[1], 'LB-D', 4)
+        response = self.client.get(reverse('details', args=['LB-D']))
+        self.assertEqual(response.context['ranks']['genre'], {'value': 'Shooter', 'rank': 2,
+                                                              'score': Game.objects.get(source_id='LB-D').bayes_score})
+        self.assertContains(response, '#2 global')
+        Game.objects.get(source_id='LB-A').delete()
+        self.assertEqual(gameRanks(Game.objects.get(source_id='LB-D'))['global']['rank'], 1)
+        self.assertConsistent()
+
+
+class SimilarGamesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f's{i}') for i in range(6)]
+        cls.games = {
+            name: Game.objects.create(source_id=f'SIM-{name}', title=name, thumbnail='http://example.com/t.jpg')
+            for name in 'ABCDE'
+        }
+        votes = [(u, 'A', 5) for u in range(4)] + [(u, 'B', 4) for u in range(4)] + \
+                [(0, 'C', 5), (1, 'C', 5), (4, 'D', 5), (5, 'D', 5), (4, 'E', 4), (5, 'E', 5), (2, 'E', 2)]
+        client = Client()
+        for user, name, score in votes:
+            cls.vote(client, cls.users[user], name, score)
+
+    @staticmethod
+    def vote(client, user, name, score):
+        client.force_login(user)
+        client.post(reverse('rate', args=[f'SIM-{name}']), {'score': score})
+
+    def setUp(self):
+        cache.clear()
+
+    def rate(self, user, name, score):
+        self.vote(self.client, self.users[user], name, score)
+
+    def neighbors(self):
+        return {
+            game.title: [(entry.similar.title, round(entry.score, 6)) for entry in game.similar_entries.select_related('similar')]
+            for game in Game.objects.order_by('title')
+        }
+
+    def test_full_computation(self):
+        computeSimilarGames(full=True)
+        neighbors = self.neighbors()
+        self.assertEqual(neighbors['A'], [('B', 1.0), ('C', round(2 / math.sqrt(8), 6))])
+        self.assertEqual(neighbors['D'], [('E', 1.0)])
+        self.assertFalse(Game.objects.filter(similar_dirty=True).exists())
+        self.client.force_login(self.users[0])
+        response = self.client.get(reverse('details', args=['SIM-A']))
+        self.assertEqual([game.title for game in response.context['similar_games']], ['B', 'C'])
+        data = json.loads(self.client.get(reverse('game_json', args=['SIM-A'])).content)
+        self.assertEqual(data['similar'], ['SIM-B', 'SIM-C'])
+
+    def test_incremental_run_matches_full_run(self):
+        computeSimilarGames(full=True)
+        self.rate(2, 'C', 5)
+        self.rate(3, 'D', 4)
+        self.rate(4, 'A', 5)
+        self.rate(0, 'B', 1)
+        self.assertEqual(set(Game.objects.filter(similar_dirty=True).values_list('title', flat=True)), {'A', 'B', 'C', 'D'})
+        version = Game.objects.get(title='E').version
+        computeSimilarGames()
+        incremental = self.neighbors()
+        self.assertEqual(computeSimilarGames(full=True), 0)
+        self.assertEqual(incremental, self.neighbors())
+        # E no ha recibido votos pero su lista cambia (D tiene un jugador más)
+        self.assertGreater(Game.objects.get(title='E').version, version)
+
+    def test_command_reports_engine(self):
+        out = io.StringIO()
+        call_command('similargames', stdout=out)
+        self.assertIn('Juegos similares actualizados', out.getvalue())
+        self.assertTrue(SimilarGame.objects.exists())
+
+    @skipUnless(similar.np is not None, "NumPy/SciPy no instalados")
+    def test_numpy_and_python_agree(self):
+        pairs = likedPairs(settings.SIMILAR_GAMES_MIN_SCORE)
+        targets = list(Game.objects.values_list('id', flat=True))
+        fast = similar.similarityRowsNumpy(pairs, targets, 2)
+        slow = similar.similarityRowsPython(pairs, targets, 2)
+        self.assertEqual(fast.keys(), slow.keys())
+        for game_id, row in slow.items():
+            self.assertEqual(fast[game_id].keys(), row.keys())
+            for other, score in row.items():
+                self.assertAlmostEqual(fast[game_id][other], score)
+
+
+class FacetTestCase(TestCase):
+    def setUp(self):
+        specs = [('F-1', 'Dragon Shooter', 'Shooter', 'PC'), ('F-2', 'Space Shooter', 'Shooter', 'Web'),
+                 ('F-3', 'Dragon Quest', 'MMORPG', 'PC'), ('F-4', 'Kart Racing', 'Racing', 'PC'),
+                 ('F-5', 'Dragon Kart', 'Racing', 'Web')]
+        for source_id, title, genre, platform in specs:
+            Game.objects.create(source_id=source_id, title=title, genre=genre, platform=platform,
+                                thumbnail='http://example.com/t.jpg')
+
+    def facets(self, response):
+        return {field: [(link['value'], link['count']) for link in links]
+                for field, links in response.context['facets'].items()}
+
+    def snapshot(self):
+        return sorted(FacetCount.objects.values_list('genre', 'platform', 'count'))
+
+    def test_counts_come_from_the_facet_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('explore'))
+        self.assertEqual(self.facets(response), {
+            'genre': [('Racing', 2), ('Shooter', 2), ('MMORPG', 1)],
+            'platform': [('PC', 3), ('Web', 2)],
+        })
+        grouped = [q['sql'] for q in queries if 'GROUP BY' in q['sql']]
+        self.assertTrue(grouped)
+        self.assertFalse([sql for sql in grouped if 'FROM "explore_game"' in sql])
+
+    def test_filters_narrow_games_and_other_facets(self):
+        response = self.client.get(reverse('explore') + '?genre=Racing')
+        self.assertEqual({game.source_id for game in response.context['page_obj']}, {'F-4', 'F-5'})
+        facets = self.facets(response)
+        # el género se sigue contando sin su propio filtro para poder cambiarlo
+        self.assertEqual(facets['genre'], [('Racing', 2), ('Shooter', 2), ('MMORPG', 1)])
+        self.assertEqual(facets['platform'], [('PC', 1), ('Web', 1)])
+        racing = response.context['facets']['genre'][0]
+        self.assertTrue(racing['active'])
+        self.assertNotIn('genre=', racing['url'])
+        response = self.client.get(reverse('explore') + '?genre=Racing&platform=Web')
+        self.assertEqual([game.source_id for game in response.context['page_obj']], ['F-5'])
+        self.assertContains(response, 'Racing (1)')
+
+    def test_counts_follow_the_text_query(self):
+        response = self.client.get(reverse('explore') + '?q=dragon&platform=PC')
+        self.assertEqual({game.source_id for game in response.context['page_obj']}, {'F-1', 'F-3'})
+        facets = self.facets(response)
+        self.assertEqual(facets['genre'], [('MMORPG', 1), ('Shooter', 1)])
+        self.assertEqual(facets['platform'], [('PC', 2), ('Web', 1)])
+        link = response.context['facets']['genre'][0]['url']
+        self.assertIn('q=dragon', link)
+        self.assertIn('platform=PC', link)
+
+    def test_incremental_counts_match_rebuild(self):
+        game = Game.objects.get(source_id='F-2')
+        game.genre = 'Racing'
+        game.save()
+        Game.objects.get(source_id='F-3').delete()
+        ingestGames([{'id': 90, 'title': 'Nuevo', 'genre': 'Shooter', 'platform': 'PC'},
+                     {'id': 91, 'title': 'Otro', 'genre': 'Card Game', 'platform': 'Web'}], 'LIS9-')
+        incremental = self.snapshot()
+        rebuildFacetCounts()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertNotIn('MMORPG', [genre for genre, _, _ in incremental])
+
+
+class CommentCountersTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+        self.comment = Comment.objects.create(user=self.user, game=self.game, text='Top juego')
+        self.client.login(username='alex', password='testpass')
+
+    def react(self, reaction):
+        self.client.post(reverse('react_comment', args=[self.comment.id]), {'reaction': reaction})
+        self.comment.refresh_from_db()
+        return (self.comment.likes_count, self.comment.dislikes_count)
+
+    def test_reaction_flip_and_delete(self):
+        self.assertEqual(self.react('like'), (1, 0))
+        self.assertEqual(self.react('like'), (1, 0))
+        self.assertEqual(self.react('dislike'), (0, 1))
+        CommentReaction.objects.all().delete()
+        self.comment.refresh_from_db()
+        self.assertEqual((self.comment.likes_count, self.comment.dislikes_count), (0, 0))
+
+    def test_comments_render_in_constant_queries(self):
+        def countQueries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('comments_partial', args=[self.game.source_id]))
+            return len(queries)
+        few = countQueries()
+        for i in range(20):
+            user = User.objects.create(username=f'user{i}')
+            comment = Comment.objects.create(user=user, game=self.game, text=f'Comentario {i}')
+            CommentReaction.objects.create(user=self.user, comment=comment, is_like=bool(i % 2))
+        self.assertEqual(countQueries(), few)
+
+
+class CommentPollingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+        self.url = reverse('comments_partial', args=[self.game.source_id])
+
+    def comment(self, text):
+        self.client.login(username='alex', password='testpass')
+        self.client.post(reverse('details', args=[self.game.source_id]), {'content': text})
+        self.client.logout()
+
+    def test_idle_poll_is_not_modified(self):
+        self.comment('Primero')
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.comment('Segundo')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Segundo')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_since_returns_only_changes(self):
+        self.comment('Primero')
+        version = self.client.get(self.url, {'since': 0}).json()['version']
+        self.comment('Segundo')
+        first = Comment.objects.get(text='Primero')
+        self.client.login(username='alex', password='testpass')
+        self.client.post(reverse('react_comment', args=[first.id]), {'reaction': 'like'})
+        data = self.client.get(self.url, {'since': version}).json()
+        self.assertFalse(data['full'])
+        self.assertEqual([(c['text'], c['likes']) for c in data['comments']], [('Primero', 1), ('Segundo', 0)])
+        self.assertEqual(self.client.get(self.url, {'since': data['version']}).json()['comments'], [])
+
+    def test_comments_created_outside_the_view_are_polled(self):
+        # p. ej. desde el admin o la shell
+        etag = self.client.get(self.url)['ETag']
+        version = Game.objects.get(pk=self.game.pk).version
+        Comment.objects.create(user=self.user, game=self.game, text='Desde el admin')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Desde el admin')
+        game = Game.objects.get(pk=self.game.pk)
+        self.assertEqual((game.comment_count, game.version), (1, version + 1))
+        self.assertEqual(Comment.objects.get().version, game.comments_version)
+
+    def test_since_after_delete_asks_for_full_reload(self):
+        self.comment('Primero')
+        version = self.client.get(self.url, {'since': 0}).json()['version']
+        Comment.objects.all().delete()
+        self.assertTrue(self.client.get(self.url, {'since': version}).json()['full'])
+
+
+class LiveCommentsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+
+    def test_broker_delivers_across_threads(self):
+        async def listen():
+            queue = live.broker.subscribe(self.game.id)
+            try:
+                thread = threading.Thread(target=live.broker.publish, args=(self.game.id, 7))
+                thread.start()
+                return await asyncio.wait_for(queue.get(), timeout=2)
+            finally:
+                live.broker.unsubscribe(self.game.id, queue)
+        self.assertEqual(asyncio.run(listen()), 7)
+        self.assertEqual(live.broker.subscriberCount(self.game.id), 0)
+
+    def test_comment_is_published_on_commit(self):
+        self.client.login(username='alex', password='testpass')
+        with mock.patch.object(live.broker, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('details', args=[self.game.source_id]), {'content': 'Hola'})
+        publish.assert_called_once_with(self.game.id, 1)
+
+    @override_settings(LIVE_COMMENTS=False)
+    def test_stream_disabled_without_live_comments(self):
+        response = self.client.get(reverse('comments_stream', args=[self.game.source_id]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(LIVE_COMMENTS=True)
+    async def test_stream_sends_events(self):
+        response = await self.async_client.get(reverse('comments_stream', args=[self.game.source_id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        next_event = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        live.broker.publish(self.game.id, 3)
+        self.assertEqual(await asyncio.wait_for(next_event, timeout=2), b'event: comments\ndata: 3\n\n')
+        # al desconectarse el cliente el servidor ASGI cancela la tarea que espera en la cola
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(live.broker.subscriberCount(self.game.id), 0)
+
+
+class SiteCountersTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+
+    def test_counters_are_cached_and_invalidated(self):
+        self.assertEqual(siteCounter('total_games'), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(siteCounter('total_games'), 1)
+        Game.objects.create(source_id='LIS1-2', title='Otro', thumbnail='http://example.com/img.png')
+        self.assertEqual(siteCounter('total_games'), 2)
+        Comment.objects.create(user=self.user, game=self.game, text='Hola')
+        self.assertEqual(siteCounter('total_comments'), 1)
+        self.game.delete()
+        self.assertEqual((siteCounter('total_games'), siteCounter('total_comments')), (1, 0))
+
+    def test_metrics_are_lazy(self):
+        # un parcial que no pinta el pie no paga ninguna consulta de contadores
+        response = self.client.get(reverse('explore'), HTTP_HX_REQUEST='true')
+        self.assertEqual(cache.get('site-counter:total_games'), None)
+        response = self.client.get(reverse('explore'))
+        self.assertContains(response, 'Juegos: 1.')
+
+
+class UserStatsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.games = [
+            Game.objects.create(source_id=f'LIS1-{i}', title=f'Juego {i}', thumbnail='http://example.com/img.png')
+            for i in range(2)
+        ]
+        self.client.login(username='alex', password='testpass')
+
+    def stats(self):
+        return UserStats.objects.get(pk=self.user.pk)
+
+    def test_views_update_stats_incrementally(self):
+        first, second = self.games
+        self.client.post(reverse('rate', args=[first.source_id]), {'score': '5'})
+        self.client.post(reverse('rate', args=[second.source_id]), {'score': '2'})
+        self.client.post(reverse('rate', args=[second.source_id]), {'score': '4'})
+        self.client.post(reverse('details', args=[first.source_id]), {'content': 'Hola'})
+        self.client.get(reverse('follow_tool', args=[first.source_id, 'true']))
+        self.client.get(reverse('follow_tool', args=[first.source_id, 'true']))
+        comment = Comment.objects.get()
+        self.client.post(reverse('react_comment', args=[comment.id]), {'reaction': 'like'})
+        self.client.post(reverse('react_comment', args=[comment.id]), {'reaction': 'dislike'})
+        stats = self.stats()
+        self.assertEqual((stats.votes, stats.score_sum, stats.comments, stats.follows, stats.reactions), (2, 9, 1, 1, 1))
+        self.assertEqual(stats.averageScore(), 4.5)
+
+        self.client.get(reverse('follow_tool', args=[first.source_id, 'false']))
+        Rating.objects.filter(game=first).delete()
+        stats = self.stats()
+        self.assertEqual((stats.votes, stats.score_sum, stats.follows), (1, 4, 0))
+
+    def test_profile_reads_one_row(self):
+        Rating.objects.create(user=self.user, game=self.games[0], score=3)
+        response = self.client.get(reverse('user_profile'))
+        self.assertEqual(response.context['num_ratings'], 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('user_profile'))
+        self.assertFalse(any('explore_rating' in q['sql'] for q in queries))
+
+    def test_rebuild(self):
+        Rating.objects.create(user=self.user, game=self.games[0], score=3)
+        UserStats.objects.all().delete()
+        call_command('rebuildstats', stdout=io.StringIO())
+        self.assertEqual((self.stats().votes, self.stats().score_sum), (1, 3))
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        Game.objects.bulk_create([
+            Game(source_id=f'E-{i}', title=f'Juego {i}', thumbnail='http://example.com/t.jpg')
+            for i in range(5)
+        ])
+        self.game = Game.objects.get(source_id='E-3')
+        Rating.objects.create(user=self.user, game=self.game, score=4)
+        call_command('rebuildstats', stdout=io.StringIO())
+        self.client.login(username='alex', password='testpass')
+        self.client.post(reverse('details', args=[self.game.source_id]), {'content': 'Hola'})
+
+    def test_ndjson_export(self):
+        response = self.client.get(reverse('export_games'))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['source_id'] for line in lines], [f'E-{i}' for i in range(5)])
+        exported = lines[3]
+        self.assertEqual((exported['average_rating'], exported['rating_count'], exported['comment_count']), (4.0, 1, 1))
+
+    def test_invalid_since_is_rejected(self):
+        for since in ('ayer', '2024-13-45T00:00'):
+            response = self.client.get(reverse('export_games'), {'since': since})
+            self.assertEqual(response.status_code, 400)
+            with self.assertRaises(CommandError):
+                call_command('exportgames', since=since, stdout=io.StringIO())
+
+    def test_json_export_with_since_and_small_chunks(self):
+        since = timezone.now()
+        Game.objects.filter(source_id='E-1').update(updated_at=since + timezone.timedelta(seconds=1))
+        with mock.patch('explore.export.EXPORT_CHUNK_SIZE', 2):
+            response = self.client.get(reverse('export_games'), {'format': 'json', 'since': since.isoformat()})
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([game['source_id'] for game in data], ['E-1'])
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('exportgames', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+
+    def test_game_json_has_no_aggregate_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse('game_json', args=[self.game.source_id])).json()
+        self.assertEqual(data['comment_count'], 1)
+        self.assertFalse(any('COUNT(' in q['sql'] or 'AVG(' in q['sql'] for q in queries))
+
+
+class GameJsonCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+        self.url = reverse('game_json', args=[self.game.source_id])
+
+    def test_repeat_requests_hit_cache_and_304(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        with self.assertNumQueries(1):
+            again = self.client.get(self.url)
+        self.assertEqual(again.content, first.content)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_bump_version(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.login(username='alex', password='testpass')
+        self.client.post(reverse('rate', args=[self.game.source_id]), {'score': '3'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rating_count'], 1)
+        etag = response['ETag']
+        self.client.post(reverse('details', args=[self.game.source_id]), {'content': 'Hola'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['comment_count'], 1)
+        self.game.refresh_from_db()
+        self.game.title = 'Hearthstone 2'
+        self.game.save()
+        self.assertEqual(self.client.get(self.url).json()['title'], 'Hearthstone 2')
+
+    def test_stale_edit_changes_etag(self):
+        stale = Game.objects.get(pk=self.game.pk)
+        self.client.login(username='alex', password='testpass')
+        self.client.post(reverse('rate', args=[self.game.source_id]), {'score': '3'})
+        self.client.post(reverse('details', args=[self.game.source_id]), {'content': 'Hola'})
+        etag = self.client.get(self.url)['ETag']
+        comments_version = Game.objects.get(pk=self.game.pk).comments_version
+        stale.title = 'Editado'
+        stale.save()
+        self.assertEqual(stale.version, Game.objects.get(pk=self.game.pk).version)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['title'], 'Editado')
+        self.assertEqual(Game.objects.get(pk=self.game.pk).comments_version, comments_version)
+
+
+class CardFragmentCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alex = User.objects.create_user(username='alex', password='testpass')
+        self.bea = User.objects.create_user(username='bea', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-1', title='Hearthstone', thumbnail='http://example.com/img.png')
+        FollowedGame.objects.create(user=self.alex, game=self.game)
+
+    def test_card_is_cached_per_version_and_follow_button_per_user(self):
+        key = make_template_fragment_key('game_card', [self.game.id, self.game.version])
+        self.client.login(username='alex', password='testpass')
+        self.assertContains(self.client.get(reverse('explore')), 'Dejar de seguir')
+        self.assertIsNotNone(cache.get(key))
+        self.client.login(username='bea', password='testpass')
+        response = self.client.get(reverse('explore'))
+        self.assertNotContains(response, 'Dejar de seguir')
+        self.assertContains(response, 'Seguir')
+        # un voto cambia la versión y con ella la tarjeta
+        self.client.post(reverse('rate', args=[self.game.source_id]), {'score': '5'})
+        self.assertContains(self.client.get(reverse('explore')), '(1 voto)')
+
+
+class UserLibraryTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        other = User.objects.create_user(username='bea', password='testpass')
+        Game.objects.bulk_create([
+            Game(source_id=f'U-{i}', title=f'Juego {i:02d}', thumbnail='http://example.com/t.jpg', rating_avg=i / 10)
+            for i in range(30)
+        ])
+        games = list(Game.objects.order_by('id'))
+        Rating.objects.bulk_create([Rating(user=self.user, game=game, score=i % 6) for i, game in enumerate(games)])
+        Rating.objects.bulk_create([Rating(user=other, game=game, score=1) for game in games])
+        FollowedGame.objects.create(user=self.user, game=games[0])
+        self.client.login(username='alex', password='testpass')
+
+    def scroll(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url, HTTP_HX_REQUEST='true')
+            seen.extend(response.context['page_obj'])
+            url = response.context['next_url']
+        return seen
+
+    def test_voted_library_is_paginated_with_user_scores(self):
+        response = self.client.get(reverse('user_games', args=['voted']))
+        self.assertEqual(len(response.context['page_obj']), 21)
+        games = self.scroll(reverse('user_games', args=['voted']) + '?sort=score')
+        self.assertEqual(len(games), 30)
+        scores = [game.user_score for game in games]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(sorted(game.source_id for game in games if game.is_followed), ['U-0'])
+
+    def test_sort_by_title_and_followed(self):
+        games = self.scroll(reverse('user_games', args=['voted']) + '?sort=title')
+        self.assertEqual([game.title for game in games], sorted(game.title for game in games))
+        games = self.scroll(reverse('user_games', args=['followed']))
+        self.assertEqual([(game.source_id, game.user_score) for game in games], [('U-0', 0)])
+
+    def test_single_query_for_the_page(self):
+        self.client.get(reverse('user_games', args=['voted']), HTTP_HX_REQUEST='true')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('user_games', args=['voted']), HTTP_HX_REQUEST='true')
+        game_queries = [q for q in queries if 'explore_game' in q['sql']]
+        self.assertEqual(len(game_queries), 1)
+
+
+class SqlInstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        self.game = Game.objects.create(source_id='LIS1-9', title='Medido', thumbnail='http://example.com/t.jpg')
+        Comment.objects.create(user=self.user, game=self.game, text='hola')
+
+    def test_disabled_by_default(self):
+        response = Client().get(reverse('details', args=['LIS1-9']))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SQL_INSTRUMENTATION=True, SQL_SLOW_REQUEST_MS=0)
+    def test_server_timing_and_slow_request_log(self):
+        client = Client()
+        client.force_login(self.user)
+        with self.assertLogs('gamerank.performance', 'WARNING') as logs:
+            response = client.get(reverse('details', args=['LIS1-9']))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=')
+        payload = logs.records[0].performance
+        self.assertEqual(payload['view'], 'details')
+        self.assertGreater(payload['queries'], 0)
+        self.assertGreater(payload['template_ms'], 0)
+        self.assertLessEqual(len(payload['slowest']), settings.SQL_SLOWEST_QUERIES)
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_fast_requests_are_not_logged(self):
+        client = Client()
+        client.force_login(self.user)
+        with self.assertNoLogs('gamerank.performance'):
+            client.get(reverse('details', args=['LIS1-9']))
+
+    def test_duplicate_queries_by_call_site(self):
+        games = [Game.objects.create(source_id=f'LIS1-N{i}', title=f'N {i}', thumbnail='http://example.com/t.jpg')
+                 for i in range(6)]
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for game in games:
+                game.ratings.count()
+            Game.objects.count()
+        duplicates = metrics.duplicates(5)
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0]['count'], 6)
+        self.assertIn('explore/tests.py', duplicates[0]['site'])
+
+    def test_queries_from_templates_point_at_the_template_line(self):
+        for i in range(5):
+            Game.objects.create(source_id=f'LIS1-T{i}', title=f'T {i}', thumbnail='http://example.com/t.jpg')
+        template = engines['django'].from_string("{% for game in games %}\n{{ game.ratings.count }}{% endfor %}")
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            template.render({'games': Game.objects.all()})
+        duplicates = metrics.duplicates(5)
+        self.assertEqual(len(duplicates), 1)
+        self.assertTrue(duplicates[0]['site'].endswith(':2'), duplicates[0]['site'])
+
+
+class RequestProfilerTestCase(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='admin', password='testpass', is_staff=True, is_superuser=True)
+        self.user = User.objects.create_user(username='alex', password='testpass')
+        Game.objects.create(source_id='LIS1-9', title='Perfilado', thumbnail='http://example.com/t.jpg')
+
+    def test_sampler_collects_collapsed_stacks(self):
+        def busyLoop():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+        sampler = Sampler(threading.get_ident(), 0.001)
+        sampler.start()
+        busyLoop()
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        self.assertIn('busyLoop (explore/tests.py:', sampler.collapsed())
+        self.assertRegex(sampler.collapsed().splitlines()[0], r';.* \d+$')
+        self.assertIn('busyLoop', sampler.summary())
+
+    def test_only_staff_trigger_profiles(self):
+        self.client.force_login(self.user)
+        with mock.patch('explore.profiling.Sampler') as sampler:
+            response = self.client.get(reverse('details', args=['LIS1-9']) + '?_profile=1')
+            self.client.get(reverse('details', args=['LIS1-9']))
+        sampler.assert_not_called()
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_profile_is_stored_and_downloadable(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('details', args=['LIS1-9']), HTTP_X_PROFILE='1')
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.view_name, 'details')
+        self.assertEqual(profile.status, 200)
+        self.assertEqual(profile.user, self.staff)
+        self.assertIn('muestras', profile.summary)
+        download = self.client.get(reverse('admin:explore_requestprofile_collapsed', args=[profile.id]))
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+        self.assertEqual(download.content.decode(), profile.collapsed)
+        self.assertEqual(self.client.get(reverse('admin:explore_requestprofile_changelist')).status_code, 200)
+
+    @override_settings(REQUEST_PROFILES_KEEP=2)
+    def test_old_profiles_are_pruned(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get(reverse('explore') + '?_profile=1')
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+
+class BenchmarkTestCase(TestCase):
+    def test_seed_and_measure_views(self):
+        data = seedData(games=60, users=5, ratings=100, comments=40, reactions=30, follows=10)
+        self.assertEqual(Game.objects.count(), 60)
+        self.assertEqual(Rating.objects.count(), 100)
+        self.assertEqual(CommentReaction.objects.count(), 30)
+        # los agregados quedan como los dejaría rebuildstats
+        game = Game.objects.filter(rating_count__gt=0).first()
+        self.assertEqual(game.rating_count, game.ratings.count())
+        results = runBenchmark(iterations=3, depth=1)
+        self.assertIn('index_deep', results)
+        for name, result in results.items():
+            self.assertEqual(result['statuses'], [200], name)
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_p50'], 0)
+        report = benchmarkReport(data, results, 3, False)
+        self.assertEqual(json.loads(json.dumps(report))['data']['games'], 60)
+        self.assertEqual(len(compareReports(report, report)), len(results))
+
+
+class SqliteProductionTestCase(TestCase):
+    # conexiones propias contra un fichero temporal: la base de datos de test está en memoria y ahí no hay WAL
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = str(Path(tmp.name) / 'prod.sqlite3')
+
+    def openConnection(self, options):
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.path, 'OPTIONS': options,
+        }})
+        return handler['default']
+
+    def runConcurrently(self, options):
+        # un lector mantiene abierta su transacción mientras otro hilo escribe y hace commit
+        writer_conn = self.openConnection(options)
+        with writer_conn.cursor() as cursor:
+            cursor.execute("CREATE TABLE IF NOT EXISTS votes (id INTEGER PRIMARY KEY, score INTEGER)")
+            cursor.execute("INSERT INTO votes (score) VALUES (5)")
+        writer_conn.close()
+        reading = threading.Event()
+        written = threading.Event()
+        result = {}
+
+        def reader():
+            conn = self.openConnection(options)
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("BEGIN")
+                    cursor.execute("SELECT COUNT(*) FROM votes")
+                    result['before'] = cursor.fetchone()[0]
+                    reading.set()
+                    written.wait(5)
+                    cursor.execute("SELECT COUNT(*) FROM votes")
+                    result['snapshot'] = cursor.fetchone()[0]
+                    cursor.execute("COMMIT")
+                    cursor.execute("SELECT COUNT(*) FROM votes")
+                    result['after'] = cursor.fetchone()[0]
+            finally:
+                conn.close()
+
+        def writer():
+            conn = self.openConnection(options)
+            reading.wait(5)
+            started = time.monotonic()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    cursor.execute("INSERT INTO votes (score) VALUES (3)")
+                    cursor.execute("COMMIT")
+                result['writer'] = 'ok'
+            except OperationalError as e:
+                result['writer'] = str(e)
+            finally:
+                result['write_seconds'] = time.monotonic() - started
+                written.set()
+                conn.close()
+
+        threads = [threading.Thread(target=reader), threading.Thread(target=writer)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return result
+
+    def test_production_options_apply_pragmas(self):
+        conn = self.openConnection(settings.SQLITE_PRODUCTION_OPTIONS)
+        try:
+            with conn.cursor() as cursor:
+                pragmas = {}
+                for name in ('journal_mode', 'busy_timeout', 'synchronous', 'cache_size', 'mmap_size'):
+                    cursor.execute(f"PRAGMA {name}")
+                    pragmas[name] = cursor.fetchone()[0]
+            self.assertEqual(pragmas['journal_mode'], 'wal')
+            self.assertEqual(pragmas['busy_timeout'], settings.SQLITE_PRAGMAS['busy_timeout'])
+            self.assertEqual(pragmas['synchronous'], 1)  # NORMAL
+            self.assertEqual(pragmas['cache_size'], settings.SQLITE_PRAGMAS['cache_size'])
+            self.assertEqual(conn.transaction_mode, 'IMMEDIATE')
+        finally:
+            conn.close()
+
+    def test_writer_commits_while_reader_holds_snapshot(self):
+        result = self.runConcurrently(settings.SQLITE_PRODUCTION_OPTIONS)
+        self.assertEqual(result['writer'], 'ok')
+        self.assertLess(result['write_seconds'], 1)
+        # el lector sigue viendo su instantánea hasta terminar su transacción
+        self.assertEqual((result['before'], result['snapshot'], result['after']), (1, 1, 2))
+
+    def test_rollback_journal_blocks_writer_behind_reader(self):
+        result = self.runConcurrently({'init_command': 'PRAGMA journal_mode=DELETE;PRAGMA busy_timeout=200'})
+        self.assertIn('locked', result['writer'])
+
+
+@override_settings(THUMBNAIL_FETCHER='explore.tests.localThumbnailFetcher')
+class ThumbnailCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        THUMBNAIL_IMAGES.clear()
+        THUMBNAIL_FETCHES.clear()
+        self.user = User.objects.create_user(username='thumbs', password='testpass')
+        self.client.force_login(self.user)
+        self.game = Game.objects.create(source_id='TH-1', title='Con miniatura', thumbnail='http://example.com/a.png')
+        self.twin = Game.objects.create(source_id='TH-2', title='Misma imagen', thumbnail='http://example.com/a.png')
+        self.broken = Game.objects.create(source_id='TH-3', title='Sin imagen', thumbnail='http://example.com/roto.png')
+
+    @skipUnless(thumbnails.Image is not None, "Pillow no instalado")
+    def test_cache_resizes_and_fetches_once(self):
+        from PIL import Image
+        THUMBNAIL_IMAGES['http://example.com/a.png'] = sampleImage(800, 450)
+        version = self.game.version
+        self.assertEqual(cacheThumbnails(), (2, 1))
+        # dos juegos con la misma URL: una sola descarga
+        self.assertEqual(sorted(THUMBNAIL_FETCHES), ['http://example.com/a.png', 'http://example.com/roto.png'])
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.thumb_status, self.game.thumb_formats), ('ok', 'webp,jpg'))
+        self.assertEqual(self.game.version, version + 1)
+        self.twin.refresh_from_db()
+        self.assertEqual(self.twin.thumb_digest, self.game.thumb_digest)
+        sources = self.game.thumbnailSources()
+        self.assertEqual([source['type'] for source in sources], ['image/webp', 'image/jpeg'])
+        response = self.client.get(sources[0]['url'])
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (400, 225))
+        # las pendientes ya no se vuelven a descargar
+        THUMBNAIL_FETCHES.clear()
+        self.assertEqual(cacheThumbnails(), (0, 0))
+        self.assertEqual(THUMBNAIL_FETCHES, [])
+
+    @skipUnless(thumbnails.Image is not None, "Pillow no instalado")
+    def test_templates_use_local_variants_with_fallback(self):
+        THUMBNAIL_IMAGES['http://example.com/a.png'] = sampleImage(300, 200)
+        cacheThumbnails()
+        self.game.refresh_from_db()
+        html = self.client.get(reverse('explore')).content.decode()
+        self.assertIn(f'<source type="image/webp" srcset="{self.game.thumbnailSources()[0]["url"]}">', html)
+        self.assertIn(f'src="{self.game.thumbnailUrl()}"', html)
+        # la que falló se sigue pintando con la URL original
+        self.assertIn('src="http://example.com/roto.png"', html)
+        html = self.client.get(reverse('details', args=['TH-1'])).content.decode()
+        self.assertIn(self.game.thumbnailUrl(), html)
+
+    def test_failed_download_keeps_original_url(self):
+        self.assertEqual(cacheThumbnails(), (0, 3))
+        self.broken.refresh_from_db()
+        self.assertEqual(self.broken.thumb_status, 'failed')
+        self.assertEqual(self.broken.thumbnailSources(), [])
+        self.assertEqual(self.broken.thumbnailUrl(), 'http://example.com/roto.png')
+        # sólo se reintentan con --retry-failed
+        self.assertEqual(cacheThumbnails(), (0, 0))
+        THUMBNAIL_IMAGES['http://example.com/roto.png'] = b'no es una imagen'
+        self.assertEqual(cacheThumbnails(retry_failed=True), (0, 3))
+
+    def test_without_pillow_stores_original(self):
+        gif = b'GIF89a\x01\x00\x01\x00\x00\x00\x00;'
+        THUMBNAIL_IMAGES['http://example.com/a.png'] = gif
+        with mock.patch.object(thumbnails, 'Image', None):
+            cacheThumbnails()
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.thumb_formats, 'gif')
+        response = self.client.get(self.game.thumbnailUrl())
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(b''.join(response.streaming_content), gif)
+        self.assertEqual(sniffFormat(b'\x89PNG\r\n\x1a\n...'), 'png')
+
+    @skipUnless(thumbnails.Image is not None, "Pillow no instalado")
+    def test_changed_thumbnail_is_fetched_again(self):
+        THUMBNAIL_IMAGES['http://example.com/a.png'] = sampleImage(300, 200)
+        THUMBNAIL_IMAGES['http://example.com/b.png'] = sampleImage(200, 300)
+        cacheThumbnails()
+        game = Game.objects.get(pk=self.game.pk)
+        old_digest = game.thumb_digest
+        game.thumbnail = 'http://example.com/b.png'
+        game.save()
+        game.refresh_from_db()
+        self.assertEqual((game.thumb_digest, game.thumb_status), ('', ''))
+        self.assertEqual(game.thumbnailUrl(), 'http://example.com/b.png')
+        cacheThumbnails()
+        game.refresh_from_db()
+        self.assertEqual(game.thumb_status, 'ok')
+        self.assertNotEqual(game.thumb_digest, old_digest)
+        # editar otros campos no toca la copia local
+        game.title = 'Otro título'
+        game.save()
+        game.refresh_from_db()
+        self.assertEqual(game.thumb_status, 'ok')
+
+    def test_unknown_thumbnail_is_404(self):
+        self.assertEqual(self.client.get(reverse('thumbnail', args=['0' * 24 + '-card.jpg'])).status_code, 404)
+
+class StaticPipelineTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.static_root.cleanup)
+        override = override_settings(STATIC_ROOT=cls.static_root.name)
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def setUp(self):
+        cache.clear()
+        self.styles = staticfiles_storage.url('sb-admin/dist/css/styles.css')
+        self.original = (Path(settings.BASE_DIR) / 'explore/static/sb-admin/dist/css/styles.css').read_bytes()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.styles, r'^/static/sb-admin/dist/css/styles\.[0-9a-f]{12}\.css$')
+        hashed = Path(self.static_root.name) / self.styles[len('/static/'):]
+        self.assertEqual(gzip.decompress(Path(f'{hashed}.gz').read_bytes()), self.original)
+        # las imágenes ya comprimidas no llevan variante
+        logo = Path(self.static_root.name) / staticfiles_storage.stored_name('images/GameRank.png')
+        self.assertFalse(Path(f'{logo}.gz').exists())
+        self.assertIn(self.styles, self.client.get(reverse('explore')).content.decode())
+
+    def test_hashed_assets_are_immutable_and_precompressed(self):
+        response = self.client.get(self.styles, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.original)
+        response = self.client.get(self.styles, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content), self.original)
+
+    @skipUnless(staticpipeline.brotli is not None, "brotli no instalado")
+    def test_brotli_preferred_when_available(self):
+        response = self.client.get(self.styles, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_unhashed_names_revalidate(self):
+        response = self.client.get('/static/sb-admin/dist/css/styles.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.client.get('/static/sb-admin/dist/css/styles.css',
+                                   HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/static/no-existe.css').status_code, 404)
+
+class SyncTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        json_path = Path(self.tmp.name) / 'games.json'
+        json_path.write_text(json.dumps([
+            {'id': 1, 'title': 'Forge of Empires', 'short_description': 'Repetido',
+             'platform': 'PC', 'genre': 'Strategy', 'thumbnail': 'http://example.com/1.jpg',
+             'game_url': 'http://example.com/1'},
+            {'id': 2, 'title': 'Juego Nuevo', 'short_description': 'Nuevo',
+             'platform': 'PC', 'genre': 'Shooter', 'thumbnail': 'http://example.com/2.jpg',
+             'game_url': 'http://example.com/2'},
+        ]))
+        self.sources = [
+            {'name': 'listado1', 'url': LISTADO1.as_uri(), 'format': 'xml', 'prefix': 'LIS1-'},
+            {'name': 'local', 'url': json_path.as_uri(), 'format': 'json', 'prefix': 'LIS2-'},
+        ]
+
+    def test_sync_from_local_sources(self):
+        with override_settings(CATALOG_SOURCES=self.sources):
+            states = syncGames()
+        self.assertEqual([s.last_status for s in states], ['ok', 'ok'])
+        self.assertEqual(Game.objects.filter(source_id__startswith='LIS1-').count(), 78)
+        # el título repetido del listado JSON no se vuelve a importar
+        self.assertEqual(list(Game.objects.filter(source_id__startswith='LIS2-').values_list('title', flat=True)), ['Juego Nuevo'])
+
+    def test_sync_not_modified(self):
+        with override_settings(CATALOG_SOURCES=self.sources):
+            syncGames()
+            states = syncGames()
+        self.assertEqual([s.last_status for s in states], ['not_modified', 'not_modified'])
+        self.assertTrue(SyncState.objects.get(source='listado1').last_modified)
+
+    def test_sync_error_is_recorded(self):
+        sources = [{'name': 'roto', 'url': (Path(self.tmp.name) / 'no-existe.xml').as_uri(), 'format': 'xml', 'prefix': 'X-'}]
+        with override_settings(CATALOG_SOURCES=sources):
+            state, = syncGames()
+        self.assertEqual(state.last_status, 'error')
+        self.assertEqual(Game.objects.count(), 0)
+
+    def test_normalized_title_dedup(self):
+        Game.objects.create(source_id='OLD-1', title='  forge of   EMPIRES ', thumbnail='http://example.com/x.jpg')
+        self.assertEqual(Game.objects.get(source_id='OLD-1').normalized_title, 'forge of empires')
+        with override_settings(CATALOG_SOURCES=self.sources[:1]):
+            syncGames()
+        self.assertEqual(Game.objects.filter(normalized_title='forge of empires').count(), 1)
+
+    def test_ingest_is_set_based(self):
+        entries = [
+            {'id': i, 'title': f'Juego {i}', 'short_description': '', 'platform': 'PC',
+             'genre': 'MMORPG', 'thumbnail': 'http://example.com/t.jpg', 'game_url': ''}
+            for i in range(1200)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            created = ingestGames(entries, 'BULK-')
+        self.assertEqual(created, 1200)
+        # unas pocas consultas por lote, nunca una por juego
+        self.assertLess(len(queries), len(entries) // 20)
+        self.assertEqual(ingestGames(entries, 'BULK-'), 0)
+
+
+class ConcurrentSyncTestCase(TestCase):
+    def setUp(self):
+        feed = json.dumps([{'id': 7, 'title': 'Lento', 'short_description': '', 'platform': 'PC',
+                            'genre': 'MMORPG', 'thumbnail': 'http://example.com/7.jpg', 'game_url': ''}]).encode()
+        self.server = FeedServer({
+            '/a.json': (feed, 0.5, '"v1"'),
+            '/b.json': (b'[]', 0.5, ''),
+            '/colgado.json': (b'[]', 3, ''),
+        })
+        self.addCleanup(self.server.close)
+
+    def sources(self, *paths, **extra):
+        return [dict({'name': path, 'url': self.server.url(path), 'format': 'json', 'prefix': 'T-'}, **extra)
+                for path in paths]
+
+    def test_fetches_run_concurrently(self):
+        # cada respuesta espera a que llegue la otra petición: sólo acaban si se solapan
+        barrier = threading.Barrier(2, timeout=5)
+        self.server.feeds['/a-barrera.json'] = (self.server.feeds['/a.json'][0], barrier, '')
+        self.server.feeds['/b-barrera.json'] = (b'[]', barrier, '')
+        with override_settings(CATALOG_SOURCES=self.sources('/a-barrera.json', '/b-barrera.json')):
+            states = syncGames()
+        self.assertEqual([s.last_status for s in states], ['ok', 'ok'])
+        self.assertFalse(barrier.broken)
+        self.assertGreater(states[0].insert_ms, 0)
+
+    def test_fetch_time_is_measured(self):
+        with override_settings(CATALOG_SOURCES=self.sources('/a.json')):
+            state, = syncGames()
+        self.assertGreaterEqual(state.fetch_ms, 500)
+
+    def test_conditional_request_returns_not_modified(self):
+        with override_settings(CATALOG_SOURCES=self.sources('/a.json')):
+            syncGames()
+            state, = syncGames()
+        self.assertEqual(state.last_status, 'not_modified')
+        self.assertEqual(state.etag, '"v1"')
+
+    def test_timeout_and_circuit_breaker(self):
+        with override_settings(CATALOG_SOURCES=self.sources('/colgado.json', timeout=0.2),
+                               CATALOG_BREAKER_THRESHOLD=2, CATALOG_BREAKER_COOLDOWN=60):
+            first, = syncGames()
+            self.assertEqual(first.last_status, 'error')
+            self.assertLess(first.fetch_ms, 2000)
+            self.assertIsNone(first.open_until)
+            second, = syncGames()
+            self.assertEqual(second.consecutive_failures, 2)
+            self.assertIsNotNone(second.open_until)
+            # con el circuito abierto ni siquiera se hace la petición
+            third, = syncGames()
+        self.assertEqual(third.last_status, 'skipped')
+        self.assertEqual(third.consecutive_failures, 2)
+
+
+class StreamingParseTestCase(TestCase):
+    def test_json_array_in_small_chunks(self):
+        entries = [{'id': i, 'title': f'Juego ñ {i}', 'tags': [1, 2, {'a': 'b'}]} for i in range(50)]
+        fp = io.BytesIO(json.dumps(entries, ensure_ascii=False, indent=1).encode())
+        # trozos de 7 bytes: corta objetos y caracteres multibyte a la mitad
+        self.assertEqual(list(iterJsonArray(fp, chunk_size=7)), entries)
+        self.assertEqual(list(iterJsonArray(io.BytesIO(b' [ ] '))), [])
+
+    def test_json_array_truncated(self):
+        with self.assertRaises(ValueError):
+            list(iterJsonArray(io.BytesIO(b'[{"id": 1}, {"id"'), chunk_size=4))
+
+    def test_xml_games_are_streamed(self):
+        with open(LISTADO1, 'rb') as fp:
+            games = iterXmlGames(fp)
+            first = next(games)
+            self.assertEqual(first['title'], 'Forge of Empires')
+            self.assertEqual(sum(1 for _ in games) + 1, 78)
@@ -0,0 +1,150 @@
+import hashlib
+import io
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Game
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # opcional: sin Pillow guardamos la imagen original sin redimensionar
+    Image = ImageOps = None
+
+# ------------------------------
+#   CACHÉ LOCAL DE MINIATURAS
+# ------------------------------
+# Cada miniatura se descarga una sola vez (al sincronizar el catálogo) y se guarda en
+# default_storage con variantes WebP y JPEG del ancho de las tarjetas. El nombre lleva el
+# hash del contenido, así que la URL nunca cambia de contenido y se sirve con caché
+# "immutable". Si la descarga o el procesado fallan se sigue usando la URL original.
+# La descarga pasa por THUMBNAIL_FETCHER (ruta a una función (url, timeout) -> bytes)
+# para poder sustituir el origen en tests o staging.
+
+THUMBNAIL_DIR = 'thumbs'
+THUMBNAIL_BATCH_SIZE = 100
+VARIANT = 'card'
+CONTENT_TYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif'}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def urlFetcher(url, timeout):
+    max_bytes = getattr(settings, 'THUMBNAIL_MAX_BYTES', 5 * 1024 * 1024)
+    request = urllib.request.Request(url, headers={'User-Agent': 'GameRank thumbnails'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"la miniatura supera {max_bytes} bytes")
+    return data
+
+def getFetcher():
+    return import_string(getattr(settings, 'THUMBNAIL_FETCHER', 'explore.thumbnails.urlFetcher'))
+
+def sniffFormat(data):
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+def buildVariants(data):
+    # {extensión: bytes}, de la más ligera a la de reserva (la última va en el <img>)
+    if Image is None:
+        extension = sniffFormat(data)
+        if extension is None:
+            raise ValueError("formato de imagen no reconocido")
+        return {extension: data}
+    width = getattr(settings, 'THUMBNAIL_CARD_WIDTH', 400)
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image.thumbnail((width, image.height * width // image.width + 1))
+        image = image.convert('RGB')
+        variants = {}
+        for extension, options in (('webp', {'quality': 80, 'method': 4}),
+                                   ('jpg', {'quality': 82, 'optimize': True, 'progressive': True})):
+            output = io.BytesIO()
+            image.save(output, 'WEBP' if extension == 'webp' else 'JPEG', **options)
+            variants[extension] = output.getvalue()
+    return variants
+
+def variantName(digest, extension):
+    return f"{digest}-{VARIANT}.{extension}"
+
+def storeVariants(digest, variants):
+    for extension, data in variants.items():
+        path = f"{THUMBNAIL_DIR}/{variantName(digest, extension)}"
+        # mismo hash, mismo contenido: si ya existe no hay nada que escribir
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(data))
+
+def fetchThumbnail(fetcher, url, timeout):
+    # se ejecuta en el pool de hilos: sólo red, nada de base de datos
+    try:
+        return fetcher(url, timeout), None
+    except Exception as e:
+        return None, e
+
+def processThumbnail(data):
+    digest = hashlib.sha256(data).hexdigest()[:24]
+    variants = buildVariants(data)
+    storeVariants(digest, variants)
+    return digest, ','.join(variants)
+
+def cacheThumbnails(games=None, retry_failed=False):
+    # devuelve (guardadas, fallidas)
+    if games is None:
+        statuses = ['', 'failed'] if retry_failed else ['']
+        games = Game.objects.filter(thumb_status__in=statuses)
+    games = games.exclude(thumbnail='').order_by('id')
+    fetcher = getFetcher()
+    timeout = getattr(settings, 'THUMBNAIL_TIMEOUT', 10)
+    workers = getattr(settings, 'THUMBNAIL_WORKERS', 8)
+    cached = failed = 0
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(games.filter(id__gt=last_id).values_list('id', 'thumbnail')[:THUMBNAIL_BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            urls = {url for _, url in batch}
+            # una URL que ya tenga otro juego en caché no se vuelve a descargar
+            results = {
+                url: (digest, formats)
+                for url, digest, formats in Game.objects.filter(thumbnail__in=urls, thumb_status='ok')
+                .values_list('thumbnail', 'thumb_digest', 'thumb_formats')
+            }
+            pending = {url: pool.submit(fetchThumbnail, fetcher, url, timeout) for url in urls if url not in results}
+            for url, future in pending.items():
+                data, error = future.result()
+                try:
+                    if error is not None:
+                        raise error
+                    results[url] = processThumbnail(data)
+                except Exception:
+                    results[url] = None
+            now = timezone.now()
+            for game_id, url in batch:
+                result = results[url]
+                if result is None:
+                    Game.objects.filter(pk=game_id).update(thumb_status='failed')
+                    failed += 1
+                    continue
+                digest, formats = result
+                # la tarjeta cacheada cambia de <img>: nueva versión
+                Game.objects.filter(pk=game_id).update(
+                    thumb_digest=digest, thumb_formats=formats, thumb_status='ok',
+                    version=F('version') + 1, updated_at=now,
+                )
+                cached += 1
+    return cached, failed
@@ -1,6 +1,6 @@
 from . import views
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.contrib.auth.views import LoginView
 
 urlpatterns = [
@@ -11,8 +11,11 @@ urlpatterns = [
     path('user_games/<str:which>', views.userGamesTool, name='user_games'),
     path('follow_tool/<str:source_id>/<str:action>', views.followManager, name='follow_tool'),
     path('game/<str:source_id>/json', views.gameJson, name='game_json'),
+    path('export/games', views.exportGames, name='export_games'),
+    re_path(r'^thumbs/(?P<name>[0-9a-f]{24}-card\.(?:webp|jpg|png|gif))$', views.thumbnail, name='thumbnail'),
     path('details/<str:source_id>', views.details, name='details'),
     path('rate/<str:source_id>', views.rate, name='rate'),
     path('coments/<int:comment_id>/react/', views.reactToComment, name='react_comment'),
+    path('coments/<str:source_id>/stream', views.commentsStream, name='comments_stream'),
     path('coments/<str:source_id>', views.commentsPartial, name='comments_partial'),
 ]
@@ -1,163 +1,198 @@
-from django.http import HttpResponse
+import asyncio
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotFound, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django.template import loader
 from django.shortcuts import redirect, render
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Avg, Count, Value, Q
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery, Value
 from django.db.models.functions import Coalesce
-import urllib.request
-import json
-import xml.etree.ElementTree as ET
-from django.core.paginator import Paginator
-from .models import Game, FollowedGame, Comment, Rating, CommentReaction
+from .pagination import KeysetPaginator, nextPageUrl
+from .search import searchGames
+from .leaderboards import gameRanks
+from .similar import similarGames
+from .facets import FACET_FIELDS, facetCounts, facetLinks
+from .thumbnails import CONTENT_TYPES, IMMUTABLE_MAX_AGE, THUMBNAIL_DIR
+from .models import Game, FollowedGame, Comment, Rating, CommentReaction, UserStats
+from .live import broker
+from .export import EXPORT_FORMATS, exportChunks
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 
+LIVE_HEARTBEAT = 20  # segundos entre pings para que los proxies no corten la conexión SSE
+
 def gameJson(request, source_id):
-    try:
-        game = Game.objects.get(source_id=source_id)
-    except Game.DoesNotExist:
+    # el JSON se cachea ya serializado bajo la versión del juego; si el cliente ya
+    # tiene esa versión contestamos 304 sin tocar nada más
+    marker = Game.objects.filter(source_id=source_id).values_list('id', 'version').first()
+    if marker is None:
         return render(request, "404.html")
-
-    data = {
-        "source_id": game.source_id,
-        "title": game.title,
-        "thumbnail": game.thumbnail,
-        "genre": game.genre,
-        "platform": game.platform,
-        "developer": game.developer,
-        "publisher": game.publisher,
-        "release_date": game.release_date,
-        "description": game.description,
-        "url": game.url,
-        "average_rating": game.averageRating(),
-        "rating_count": game.ratingCount(),
-        "comment_count": game.comments.count(),
-    }
-
-    return JsonResponse(data)
-
-def createGame(game, prefix, isXML):
-    if isXML:
-        Game.objects.create(
-            source_id = f"{prefix}{game.find('id').text}",
-            title = game.find("title").text,
-            description = game.find('short_description').text,
-            platform = game.find('platform').text,
-            genre = game.find('genre').text,
-            thumbnail = game.ifind('thumbnail').text,
-            url = game.find('game_url').text,
-            developer = game.find('developer').text,
-            publisher = game.find('publisher').text,
-            release_date = game.find('release_date').text
-        )
+    game_id, version = marker
+    etag = f'"g{game_id}-{version}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
     else:
-        Game.objects.create(
-            source_id = f"{prefix}{game['id']}",
-            title = game['title'],
-            description = game['short_description'],
-            platform = game['platform'],
-            genre = game['genre'],
-            thumbnail = game['thumbnail'],
-            url = game['game_url'],
-            developer = game.get('developer', ''),
-            publisher = game.get('publisher', ''),
-            release_date = game.get('release_date', None)
-        )
-
-def titleExists(title_aux):
-    for title in Game.objects.values_list('title', flat=True):
-        if title.lower() == title_aux.lower():
-            return True
-    return False
-
-def updateGames():
-    # ----------- Listado 1: XML -----------
-    xml_url = "https://gitlab.eif.urjc.es/cursosweb/2024-2025/final-gamerank/raw/main/listado1.xml"
-    try:
-        with urllib.request.urlopen(xml_url) as response:
-            xml_data = response.read().decode()
-            root = ET.fromstring(xml_data)
-
-            for game in root.findall("game"):
-                title = game.find('title').text
-                if not titleExists(title):
-                    createGame(game, "LIS1-", True)
-    except Exception as e:
-        print("Error cargando el listado XML:", e)
-
-    # ----------- Listado 2(Opcional): JSON API (freetogame) -----------
-    json_url_2 = "https://www.freetogame.com/api/games"
-    try:
-        with urllib.request.urlopen(json_url_2) as response:
-            data = json.loads(response.read().decode())
-            for game in data:
-                title = game['title']
-                if not titleExists(title):
-                    createGame(game, "LIS2-", False)
-    except Exception as e:
-        print("Error cargando listado JSON 2:", e)
-
-    # ----------- Listado 3(Opcional): JSON API (mmobomb) -----------
-    json_url_3 = "https://www.mmobomb.com/api1/games"
-    try:
-        with urllib.request.urlopen(json_url_3) as response:
-            data = json.loads(response.read().decode())
-            for game in data:
-                title = game['title']
-                if not titleExists(title):
-                    createGame(game, "LIS3-", False)
-    except Exception as e:
-        print("Error cargando listado JSON 3:", e)
-
+        key = f'game-json:{game_id}:{version}'
+        body = cache.get(key)
+        if body is None:
+            game = Game.objects.prefetch_related('similar_entries__similar').get(id=game_id)
+            body = json.dumps(game.jsonData(), cls=DjangoJSONEncoder)
+            cache.set(key, body, settings.GAME_JSON_CACHE_TTL)
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+def exportGames(request):
+    # volcado completo del catálogo en streaming: ?format=ndjson|json&since=<ISO 8601>
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': 'format debe ser ndjson o json'}, status=400)
+    since = request.GET.get('since')
+    if since:
+        try:
+            since = parse_datetime(since)
+        except ValueError:  # bien formada pero imposible (mes 13, día 45...)
+            since = None
+        if since is None:
+            return JsonResponse({'error': 'since debe ser una fecha ISO 8601'}, status=400)
+    content_type = 'application/x-ndjson' if export_format == 'ndjson' else 'application/json'
+    return StreamingHttpResponse(exportChunks(export_format, since or None), content_type=content_type)
+
+def thumbnail(request, name):
+    # el nombre lleva el hash del contenido: nunca cambia, se puede cachear para siempre
+    path = f"{THUMBNAIL_DIR}/{name}"
+    if not default_storage.exists(path):
+        return HttpResponseNotFound()
+    response = FileResponse(default_storage.open(path), content_type=CONTENT_TYPES[name.rsplit('.', 1)[1]])
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
 
 def index(request):
-    updateGames()
-
     query = request.GET.get('q')
+    filters = {field: request.GET.get(field) for field in FACET_FIELDS if request.GET.get(field)}
     games = Game.objects.all()
+    # clasificación bayesiana: un solo voto de 5 no adelanta a juegos con muchas buenas notas
+    ordering = ('-bayes_score', '-id')
+    searched = None
     if query:
-        games = games.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(genre__icontains=query) |
-            Q(platform__icontains=query)
-        )
+        games, ordering = searchGames(games, query)
+        searched = games
+    games = games.filter(**filters)
 
-    games = games.annotate(
-                avg_rating=Coalesce(Avg('ratings__score'), Value(0.0)),
-                num_votes=Count('ratings')
-            ).order_by('-avg_rating')
     followed = set()
     if request.user.is_authenticated:
         followed = set(
             FollowedGame.objects.filter(user=request.user).values_list('game__id', flat=True)
         )
-    paginator = Paginator(games, 21)  # 21 juegos por página
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(games, ordering, 21)  # 21 juegos por página
+    page_obj = paginator.get_page(request.GET.get("cursor"))
     context = {
         "page_obj": page_obj,
-        "followed": followed
+        "next_url": nextPageUrl(request, page_obj) if page_obj.has_next else None,
+        "followed": followed,
+        "card_cache_ttl": settings.CARD_CACHE_TTL,
     }
 
     if request.headers.get("HX-Request"):  # si es una petición HTMX
         return render(request, "_game_list.html", context)
 
+    # los contadores sólo se pintan en la carga completa, no en el scroll infinito
+    context["facets"] = facetLinks(request, facetCounts(searched, filters), filters)
+    context["filters"] = filters
     return render(request, "index.html", context)
 
 def commentsPartial(request, source_id):
-    try:
-        game = Game.objects.get(source_id=source_id)
-    except Game.DoesNotExist:
+    # el polling de cada 30s pregunta con If-None-Match; si la versión de comentarios
+    # no ha cambiado contestamos 304 con una sola consulta y sin renderizar nada
+    marker = Game.objects.filter(source_id=source_id).values(
+        'id', 'comments_version', 'comments_purged_version'
+    ).first()
+    if marker is None:
         return render(request, "404.html")
-    comments = game.comments.order_by('-created_at')
-    context = {
-        'comments': comments,
-        'game': game
-    }
-    return render(request, '_comments.html', context)
+
+    since = request.GET.get('since')
+    if since is not None:
+        return commentsDelta(marker, since)
+
+    # el token CSRF va dentro del HTML, así que su secreto forma parte del ETag
+    get_token(request)
+    csrf = hashlib.md5(request.META['CSRF_COOKIE'].encode()).hexdigest()[:8]
+    etag = f'"c{marker["id"]}-{marker["comments_version"]}-{csrf}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        game = Game.objects.get(id=marker['id'])
+        comments = game.comments.select_related('user').order_by('-created_at')
+        context = {
+            'comments': comments,
+            'game': game,
+            'live_comments': settings.LIVE_COMMENTS,
+        }
+        response = render(request, '_comments.html', context)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+async def commentsStream(request, source_id):
+    # Server-Sent Events: un evento "comments" con la nueva versión cada vez que cambian
+    # los comentarios del juego; el cuadro de comentarios lo usa como hx-trigger.
+    # Sólo con ASGI (LIVE_COMMENTS): con WSGI el generador infinito bloquearía el worker
+    if not settings.LIVE_COMMENTS:
+        return HttpResponseNotFound()
+    marker = await Game.objects.filter(source_id=source_id).values('id').afirst()
+    if marker is None:
+        return HttpResponseNotFound()
+
+    async def events():
+        queue = broker.subscribe(marker['id'])
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    version = await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: comments\ndata: {version}\n\n"
+        finally:
+            broker.unsubscribe(marker['id'], queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def commentsDelta(marker, since):
+    # sólo los comentarios creados o con reacciones nuevas desde la versión del cliente
+    try:
+        since = int(since)
+    except ValueError:
+        return JsonResponse({'error': 'since inválido'}, status=400)
+    version = marker['comments_version']
+    data = {'version': version, 'full': since < marker['comments_purged_version'], 'comments': []}
+    if since < version and not data['full']:
+        changed = Comment.objects.filter(game_id=marker['id'], version__gt=since).select_related('user').order_by('created_at')
+        data['comments'] = [{
+            'id': comment.id,
+            'user': comment.user.username,
+            'text': comment.text,
+            'created_at': comment.created_at.isoformat(),
+            'likes': comment.likes_count,
+            'dislikes': comment.dislikes_count,
+        } for comment in changed]
+    return JsonResponse(data)
 
 def followManager(request, source_id, action):
     if not request.user.is_authenticated:
@@ -173,8 +208,12 @@ def followManager(request, source_id, action):
 
     to_follow = (action == 'true')
     if to_follow:
-        FollowedGame.objects.get_or_create(user=request.user, game=game)
+        with transaction.atomic():
+            follow, created = FollowedGame.objects.get_or_create(user=request.user, game=game)
+            if created:
+                UserStats.add(request.user.id, follows=1)
     else:
+        # el descuento en UserStats lo hace la señal de borrado
         FollowedGame.objects.filter(user=request.user, game=game).delete()
 
     if request.headers.get("Hx-Request"):
@@ -203,50 +242,77 @@ def rate(request, source_id):
         if score < 0 or score > 5:
             raise ValueError("Puntuación inválida")
 
-        rating, created = Rating.objects.update_or_create(
-            user=request.user,
-            game=game,
-            defaults={'score': score}
-        )
+        with transaction.atomic():
+            previous = Rating.objects.filter(user=request.user, game=game).values_list('score', flat=True).first()
+            rating, created = Rating.objects.update_or_create(
+                user=request.user,
+                game=game,
+                defaults={'score': score}
+            )
+            # si ya había votado sólo cambia la suma, no la cuenta
+            if previous is None:
+                Game.updateRatingStats(game.id, score, 1)
+                UserStats.add(request.user.id, votes=1, score_sum=score)
+            else:
+                Game.updateRatingStats(game.id, score - previous, 0)
+                UserStats.add(request.user.id, score_sum=score - previous)
         messages.success(request, "¡Puntuación guardada correctamente!")
     except (ValueError, TypeError):
         messages.error(request, "Error al guardar la puntuación.")
 
     return redirect('details', source_id=source_id)
 
+LIBRARY_SORTS = {
+    'average': ('-rating_avg', '-id'),
+    'score': ('-user_score', '-id'),
+    'title': ('normalized_title', 'id'),
+}
+
 def userGamesTool(request, which):
     if not request.user.is_authenticated:
         return redirect('login')
 
     user = request.user
 
+    # una sola consulta por página: el join con las votaciones/seguidos del usuario
+    # aporta su puntuación y si lo sigue, y se pagina por cursor como el explorador
     if which == "voted":
-        ratings = Rating.objects.filter(user=user).select_related('game')
-        user_games = [r.game for r in ratings]
+        games = Game.objects.filter(ratings__user=user).annotate(
+            user_score=F('ratings__score'),
+            is_followed=Exists(FollowedGame.objects.filter(user=user, game=OuterRef('pk'))),
+        )
         page_title = "Juegos Votados"
     elif which == "followed":
-        followed = FollowedGame.objects.filter(user=user).select_related('game')
-        user_games = [r.game for r in followed]
+        games = Game.objects.filter(followers__user=user).annotate(
+            user_score=Coalesce(Subquery(
+                Rating.objects.filter(user=user, game=OuterRef('pk')).values('score')[:1]
+            ), Value(-1)),
+            is_followed=Value(True),
+        )
         page_title = "Juegos Seguidos"
     else:
         return render(request, "404.html")
 
-    # Anotamos stats de cada juego
-    games_with_stats = Game.objects.filter(id__in=[g.id for g in user_games]).annotate(
-        avg_rating=Coalesce(Avg('ratings__score'), Value(0.0)),
-        num_votes=Count('ratings')
-    ).order_by('-avg_rating')
-
-    followed_ids = set(
-        FollowedGame.objects.filter(user=user).values_list('game__id', flat=True)
-    )
+    sort = request.GET.get('sort')
+    if sort not in LIBRARY_SORTS:
+        sort = 'average'
+    paginator = KeysetPaginator(games, LIBRARY_SORTS[sort], 21)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     context = {
-        'games': games_with_stats,
-        'followed': followed_ids,
+        'page_obj': page_obj,
+        'next_url': nextPageUrl(request, page_obj) if page_obj.has_next else None,
+        'followed': {game.id for game in page_obj if game.is_followed},
+        'card_cache_ttl': settings.CARD_CACHE_TTL,
+        'show_user_score': True,
+        'which': which,
+        'sort': sort,
         'title': page_title
     }
 
+    if request.headers.get("HX-Request"):
+        return render(request, "_game_list.html", context)
+
     return render(request, 'user_games.html', context)
 
 def details(request, source_id):
@@ -260,14 +326,13 @@ def details(request, source_id):
     if request.method == 'POST':
         content = request.POST.get('content')
         if content:
-            Comment.objects.create(
-                user=request.user,
-                game=game,
-                text=content
-            )
+            with transaction.atomic():
+                # la señal commentCreated sube la versión de comentarios y el contador
+                Comment.objects.create(user=request.user, game=game, text=content)
+                UserStats.add(request.user.id, comments=1)
             return redirect('details', source_id=source_id)
 
-    comments = Comment.objects.filter(game=game).order_by('-created_at')
+    comments = Comment.objects.filter(game=game).select_related('user').order_by('-created_at')
     user_rating = Rating.objects.filter(game=game, user=request.user).first()
     is_following = FollowedGame.objects.filter(game=game, user=request.user).exists()
     
@@ -276,6 +341,9 @@ def details(request, source_id):
         'comments': comments,
         'user_rating': user_rating,
         'is_following': is_following,
+        'ranks': gameRanks(game),
+        'similar_games': similarGames(game),
+        'live_comments': settings.LIVE_COMMENTS,
     }
     return render(request, 'game_details.html', context)
 
@@ -301,14 +369,12 @@ def profile(request):
     if not request.user.is_authenticated:
         return redirect('login')
 
-    user = request.user
-
-    num_ratings = Rating.objects.filter(user=user).count()
-    avg_rating = Rating.objects.filter(user=user).aggregate(avg=Avg('score'))['avg'] or 0
+    stats = UserStats.forUser(request.user)
 
     context = {
-        'num_ratings': num_ratings,
-        'avg_rating': round(avg_rating, 2),
+        'num_ratings': stats.votes,
+        'avg_rating': round(stats.averageScore(), 2),
+        'stats': stats,
     }
     return render(request, 'profile.html', context)
 
@@ -318,18 +384,25 @@ def help(request):
 def reactToComment(request, comment_id):
     if request.method != 'POST':
         return render(request, '405.html')
+    if not request.user.is_authenticated:
+        return redirect('login')
     try:
         comment = Comment.objects.get(id=comment_id)
-    except Game.DoesNotExist:
+    except Comment.DoesNotExist:
         return render(request, "404.html")
 
     is_like = request.POST.get('reaction') == 'like'
 
-    # Actualizar o crear la reacción
-    reaction, created = CommentReaction.objects.update_or_create(
-        user=request.user,
-        comment=comment,
-        defaults={'is_like': is_like}
-    )
+    # Actualizar o crear la reacción y ajustar los contadores del comentario
+    with transaction.atomic():
+        previous = CommentReaction.objects.filter(user=request.user, comment=comment).values_list('is_like', flat=True).first()
+        reaction, created = CommentReaction.objects.update_or_create(
+            user=request.user,
+            comment=comment,
+            defaults={'is_like': is_like}
+        )
+        Comment.updateReactionCounts(comment.id, previous, is_like, game_id=comment.game_id)
+        if previous is None:
+            UserStats.add(request.user.id, reactions=1)
 
     return redirect(request.META.get('HTTP_REFERER', 'explore'))